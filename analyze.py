@@ -0,0 +1,202 @@
+"""Разбор корпуса повторов: эффективность, скорость кликов, время до первого угадывания"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from engine import MINE, NEIGHBORS_MASK, MinesweeperEngine
+from replay import REVEAL, Replay, replay_moves
+from solver import ConstraintSolver
+
+
+def board_3bv(engine):
+    """3BV поля: минимум кликов для прохождения без флагов
+
+    Каждая пустая область (вместе с числами на ее краю) - один клик, плюс
+    по клику на каждое число, не граничащее ни с одной пустой клеткой.
+    """
+    cells = engine.cells
+    counted = bytearray(len(cells))
+    clicks = 0
+    for i, cell in enumerate(cells):
+        if counted[i] or cell & (MINE | NEIGHBORS_MASK):
+            continue
+        clicks += 1
+        counted[i] = 1
+        stack = [i]
+        while stack:
+            j = stack.pop()
+            for k in engine.neighbor_indices(j):
+                if not counted[k]:
+                    counted[k] = 1
+                    if not cells[k] & (MINE | NEIGHBORS_MASK):
+                        stack.append(k)
+    for i, cell in enumerate(cells):
+        if not counted[i] and not cell & MINE:
+            clicks += 1
+    return clicks
+
+
+def analyze_replay(path):
+    """Переиграть повтор и посчитать показатели партии
+
+    Время до первого угадывания - момент первого открытия клетки, которую
+    логика (ConstraintSolver) еще не могла признать безопасной; после него
+    решатель больше не обновляется.
+    """
+    with open(path, 'rb') as f:
+        replay = Replay(f)
+        engine = MinesweeperEngine(replay.width, replay.height, replay.mine_count, seed=replay.seed)
+        solver = None
+        first_guess_ms = None
+        clicks = 0
+        time_ms = 0
+        for action, index, time_ms, result in replay_moves(engine, replay.moves()):
+            clicks += 1
+            if solver is None:
+                if not engine.first_move:
+                    solver = ConstraintSolver(engine)
+                continue
+            if first_guess_ms is None:
+                if action == REVEAL and result.changed and index not in solver.safe:
+                    first_guess_ms = time_ms
+                else:
+                    solver.update(result.changed)
+
+    bbbv = board_3bv(engine) if not engine.first_move else 0
+    seconds = time_ms / 1000
+    return {
+        "file": os.path.basename(path),
+        "width": engine.width,
+        "height": engine.height,
+        "mines": engine.mine_count,
+        "won": engine.game_won,
+        "time_ms": time_ms,
+        "clicks": clicks,
+        "3bv": bbbv,
+        # Эффективность имеет смысл только для пройденного поля
+        "efficiency": bbbv / clicks if engine.game_won else None,
+        "clicks_per_second": clicks / seconds if seconds else 0.0,
+        "first_guess_ms": first_guess_ms,
+    }
+
+
+def analyze_batch(paths):
+    """Разобрать пачку повторов (в процессе пула); битые файлы пропускаются"""
+    games = []
+    errors = 0
+    for path in paths:
+        try:
+            games.append(analyze_replay(path))
+        except (OSError, ValueError):
+            errors += 1
+    return games, errors
+
+
+def iter_replay_paths(directory):
+    """Файлы повторов в папке (и вложенных папках) без сборки полного списка"""
+    stack = [directory]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.name.endswith(".msr"):
+                    yield entry.path
+
+
+class AnalysisStats:
+    """Итоги по корпусу повторов"""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.errors = 0
+        self.efficiency = 0.0  # Сумма по выигранным партиям
+        self.clicks_per_second = 0.0
+        self.first_guesses = []  # Время до первого угадывания в партиях, где оно было
+        self.started_at = time.perf_counter()
+
+    def add(self, games, errors):
+        self.errors += errors
+        for game in games:
+            self.games += 1
+            if game["won"]:
+                self.wins += 1
+                self.efficiency += game["efficiency"]
+            self.clicks_per_second += game["clicks_per_second"]
+            if game["first_guess_ms"] is not None:
+                self.first_guesses.append(game["first_guess_ms"])
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started_at
+        games = max(self.games, 1)
+        first_guess = (f"{statistics.median(self.first_guesses) / 1000:.1f} с"
+                       if self.first_guesses else "-")
+        return (f"{self.games} партий | побед {self.wins / games:.2%} | "
+                f"эффективность побед {self.efficiency / max(self.wins, 1):.2%} | "
+                f"кликов в секунду {self.clicks_per_second / games:.2f} | "
+                f"до первого угадывания (медиана) {first_guess} | "
+                f"битых файлов {self.errors} | {self.games / max(elapsed, 1e-9):.0f} партий/с")
+
+
+def analyze(directory, workers=None, chunk=256, output=None, report=print, interval=1.0):
+    """Разобрать все повторы папки в пуле процессов
+
+    Пути раздаются пачками по chunk; в очереди держится по две пачки на
+    процесс. Показатели каждой партии можно записать в файл JSON Lines.
+    """
+    workers = workers or os.cpu_count() or 1
+    stats = AnalysisStats()
+    paths = iter_replay_paths(directory)
+    pending = set()
+    last_report = stats.started_at
+    out = open(output, 'w', encoding='utf-8') if output else None
+    try:
+        with ProcessPoolExecutor(workers) as executor:
+            exhausted = False
+            while not exhausted or pending:
+                while not exhausted and len(pending) < workers * 2:
+                    batch = [path for _, path in zip(range(chunk), paths)]
+                    if not batch:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(analyze_batch, batch))
+
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    games, errors = future.result()
+                    stats.add(games, errors)
+                    if out is not None:
+                        for game in games:
+                            out.write(json.dumps(game, ensure_ascii=False) + "\n")
+                if time.perf_counter() - last_report >= interval:
+                    last_report = time.perf_counter()
+                    report(stats.summary())
+    finally:
+        if out is not None:
+            out.close()
+    report(stats.summary())
+    return stats
+
+
+def main(argv=None):
+    """Команда analyze: python m3.py analyze <папка с повторами>"""
+    parser = argparse.ArgumentParser(prog="m3.py analyze",
+                                     description="Разбор корпуса повторов партий")
+    parser.add_argument("directory", help="папка с файлами повторов (.msr)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument("--chunk", type=int, default=256, help="повторов в одной задаче процесса")
+    parser.add_argument("--output", default=None,
+                        help="файл JSON Lines с показателями каждой партии")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"папка {args.directory} не найдена")
+    analyze(args.directory, args.workers, max(args.chunk, 1), args.output)
+    return 0
@@ -0,0 +1,186 @@
+"""Замеры горячих путей движка: генерация, заливка, быстрое открытие, проверка победы"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from engine import MINE, NEIGHBORS_MASK, REVEALED, MinesweeperEngine, np
+
+# Предустановки из меню «Сложность» и большие пользовательские поля
+PRESETS = [
+    ("easy", 9, 9, 10),
+    ("medium", 16, 16, 40),
+    ("hard", 16, 30, 99),
+    ("large", 1000, 1000, 150000),
+    ("huge", 3000, 3000, 1350000),
+    ("sparse", 1000, 1000, 1000),  # Первый ход заливает почти все поле
+]
+SEED = 20240601  # Фиксированное зерно: замеры разных запусков сравнимы
+CHECK_WIN_CALLS = 100000  # check_win слишком быстр для одиночного замера
+
+
+def _engine(width, height, mines):
+    return MinesweeperEngine(width, height, mines, seed=SEED)
+
+
+def _generated(width, height, mines):
+    """Поле со сгенерированными минами до первого открытия"""
+    engine = _engine(width, height, mines)
+    engine.generate_mines(width // 2, height // 2)
+    engine.first_move = False
+    return engine
+
+
+def _opened(width, height, mines):
+    """Поле после первого хода в центр"""
+    engine = _engine(width, height, mines)
+    engine.reveal(width // 2, height // 2)
+    return engine
+
+
+def _chord_target(engine):
+    """Открытое число, вокруг которого остались закрытые безопасные клетки
+
+    Мины вокруг него помечаются флагами, чтобы быстрое открытие сработало.
+    """
+    cells = engine.cells
+    width = engine.width
+    for i, cell in enumerate(cells):
+        if not cell & REVEALED or not cell & NEIGHBORS_MASK:
+            continue
+        neighbors = engine.neighbor_indices(i)
+        if any(not cells[j] & (REVEALED | MINE) for j in neighbors):
+            for j in neighbors:
+                if cells[j] & MINE:
+                    engine.toggle_flag(j % width, j // width)
+            return i % width, i // width
+    return None
+
+
+def case_generate(width, height, mines):
+    engine = _engine(width, height, mines)
+    return lambda: engine.generate_mines(width // 2, height // 2)
+
+
+def case_flood(width, height, mines):
+    engine = _generated(width, height, mines)
+    return lambda: engine.reveal(width // 2, height // 2)
+
+
+def case_chord(width, height, mines):
+    engine = _opened(width, height, mines)
+    target = _chord_target(engine)
+    if target is None:
+        return None
+    return lambda: engine.chord(*target)
+
+
+def case_check_win(width, height, mines):
+    engine = _opened(width, height, mines)
+    check_win = engine.check_win
+
+    def run():
+        for _ in range(CHECK_WIN_CALLS):
+            check_win()
+    return run
+
+
+# Название замера -> (подготовка, сколько операций в одном вызове)
+CASES = {
+    "generate_mines": (case_generate, 1),
+    "flood_reveal": (case_flood, 1),
+    "chord": (case_chord, 1),
+    "check_win": (case_check_win, CHECK_WIN_CALLS),
+}
+
+
+def measure(setup, repeat):
+    """Время вызовов в миллисекундах; подготовка не входит в замер
+
+    Каждый повтор готовит свежее поле, так как операции меняют его состояние.
+    """
+    times = []
+    for _ in range(repeat):
+        run = setup()
+        if run is None:
+            return None
+        started = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def run_benchmarks(presets=PRESETS, cases=CASES, repeat=5, report=print):
+    """Прогнать все замеры и вернуть список результатов"""
+    results = []
+    for preset, width, height, mines in presets:
+        for name, (make, ops) in cases.items():
+            times = measure(lambda: make(width, height, mines), repeat)
+            if times is None:
+                report(f"{name:<15} {preset:<7} пропущено: нет подходящей клетки")
+                continue
+            result = {
+                "name": name,
+                "preset": preset,
+                "width": width,
+                "height": height,
+                "mines": mines,
+                "seed": SEED,
+                "repeat": repeat,
+                "ops": ops,
+                "best_ms": min(times),
+                "median_ms": statistics.median(times),
+                "per_op_us": min(times) * 1000 / ops,
+            }
+            results.append(result)
+            report(f"{name:<15} {preset:<7} лучшее {result['best_ms']:10.3f} мс"
+                   f"  медиана {result['median_ms']:10.3f} мс"
+                   f"  на операцию {result['per_op_us']:10.3f} мкс")
+    return results
+
+
+def compare(results, baseline, report=print):
+    """Сравнить с прошлым прогоном: отношение лучших времен по каждому замеру"""
+    old = {(r["name"], r["preset"]): r for r in baseline["results"]}
+    for result in results:
+        previous = old.get((result["name"], result["preset"]))
+        if previous is None:
+            continue
+        ratio = result["best_ms"] / previous["best_ms"] if previous["best_ms"] else 0.0
+        mark = " ⚠" if ratio > 1.1 else ""
+        report(f"{result['name']:<15} {result['preset']:<7} x{ratio:.2f}{mark}")
+
+
+def main(argv=None):
+    """Команда bench: python m3.py bench [--output файл] [--repeat N]"""
+    parser = argparse.ArgumentParser(prog="m3.py bench",
+                                     description="Замеры производительности движка")
+    parser.add_argument("--output", default="bench_results.json",
+                        help="куда записать результаты в JSON")
+    parser.add_argument("--repeat", type=int, default=5, help="повторов каждого замера")
+    parser.add_argument("--quick", action="store_true",
+                        help="только предустановки меню, без больших полей")
+    parser.add_argument("--compare", default=None,
+                        help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args(argv)
+
+    presets = PRESETS[:3] if args.quick else PRESETS
+    results = run_benchmarks(presets, repeat=max(args.repeat, 1))
+    data = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "numpy": np.__version__ if np is not None else None,
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+    return 0
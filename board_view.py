@@ -0,0 +1,504 @@
+"""Отрисовка игрового поля: сетка кнопок или один холст"""
+import tkinter as tk
+
+
+class BoardView:
+    """Общая часть отрисовщиков поля
+
+    Изменившиеся клетки не перерисовываются сразу, а копятся в очереди и
+    применяются один раз за цикл простоя Tk - каскад открытий или показ
+    всех мин превращается в одну перерисовку.
+    """
+
+    def __init__(self, game, parent):
+        self.game = game
+        self.parent = parent
+        self.width = 0
+        self.height = 0
+        self.dirty = set()  # Индексы клеток (y * width + x), ждущих перерисовки
+        self.flush_job = None
+
+    def invalidate(self, cells):
+        """Поставить клетки в очередь на перерисовку"""
+        self.dirty.update(cells)
+        if self.dirty and self.flush_job is None:
+            self.flush_job = self.parent.after_idle(self.flush)
+
+    def flush(self):
+        """Перерисовать накопленные клетки в их итоговом состоянии"""
+        if self.flush_job is not None:
+            self.parent.after_cancel(self.flush_job)
+            self.flush_job = None
+        dirty, self.dirty = self.dirty, set()
+
+        # Большой каскад дешевле перерисовать целиком
+        if len(dirty) >= self.visible_count():
+            self.redraw()
+            return
+        width = self.width
+        for i in dirty:
+            y, x = divmod(i, width)
+            self.update_cell(x, y)
+
+    def discard_pending(self):
+        """Сбросить очередь перерисовки (поле строится заново)"""
+        if self.flush_job is not None:
+            self.parent.after_cancel(self.flush_job)
+            self.flush_job = None
+        self.dirty.clear()
+
+    def cell_style(self, x, y):
+        """Текст, цвет текста, цвет фона и признак открытой клетки"""
+        engine = self.game.engine
+        colors = self.game.colors
+
+        if engine.is_revealed(x, y):
+            if engine.is_mine(x, y):
+                return "💣", colors['danger'], colors['cell_mine'], True
+            neighbors = engine.neighbors(x, y)
+            if neighbors > 0:
+                color = self.game.number_colors.get(neighbors, colors['text'])
+                return str(neighbors), color, colors['cell_revealed'], True
+            return "", colors['text'], colors['cell_revealed'], True
+
+        if engine.is_flagged(x, y):
+            return "🚩", colors['warning'], colors['cell_flag'], False
+        return "", colors['text'], colors['cell_hidden'], False
+
+    def visible_count(self):
+        """Сколько клеток отображается на экране"""
+        return self.width * self.height
+
+    def redraw(self):
+        """Перерисовать все клетки по состоянию движка"""
+        for y in range(self.height):
+            for x in range(self.width):
+                self.update_cell(x, y)
+
+    def center_on(self, x, y):
+        """Прокрутить поле так, чтобы клетка оказалась в центре (если есть прокрутка)"""
+
+    def highlight(self, x, y, text, color):
+        """Временно выделить клетку (подсказка); следующая перерисовка ее снимет"""
+        raise NotImplementedError
+
+    def build(self, width, height):
+        raise NotImplementedError
+
+    def update_cell(self, x, y):
+        raise NotImplementedError
+
+    def destroy(self):
+        raise NotImplementedError
+
+
+class ButtonBoardView(BoardView):
+    """Поле из отдельных кнопок tk.Button (запасной вариант)
+
+    Кнопки не пересоздаются между партиями: при том же размере они только
+    сбрасываются, при смене размера лишние скрываются, недостающие создаются.
+    """
+
+    def __init__(self, game, parent):
+        super().__init__(game, parent)
+        self.buttons = []  # Пул кнопок по строкам; может быть больше текущего поля
+
+    def build(self, width, height):
+        """Подготовить кнопки для поля заданного размера"""
+        self.discard_pending()
+        old_width, old_height = self.width, self.height
+        self.width = width
+        self.height = height
+        colors = self.game.colors
+
+        # Создаем недостающие кнопки
+        while len(self.buttons) < height:
+            self.buttons.append([])
+        for y in range(height):
+            row = self.buttons[y]
+            for x in range(len(row), width):
+                row.append(self._create_button(x, y))
+
+        # Скрываем кнопки, вышедшие за пределы поля
+        for y in range(min(old_height, len(self.buttons))):
+            for btn in self.buttons[y][width if y < height else 0:old_width]:
+                btn.grid_remove()
+
+        # Сбрасываем видимые кнопки в исходное состояние
+        for y in range(height):
+            for x, btn in enumerate(self.buttons[y][:width]):
+                btn.config(
+                    text="",
+                    width=2 if width > 12 else 3,
+                    font=("Arial", 10 if width > 12 else 11),
+                    fg=colors['text'],
+                    bg=colors['cell_hidden'],
+                    relief=tk.RAISED,
+                    state=tk.NORMAL
+                )
+                # Возвращаем на место кнопки, скрытые в прошлых партиях
+                if x >= old_width or y >= old_height:
+                    btn.grid()
+
+    def _create_button(self, x, y):
+        """Создать кнопку клетки и привязать события"""
+        colors = self.game.colors
+        btn = tk.Button(
+            self.parent,
+            height=1,
+            bd=2,
+            activebackground=colors['accent'],
+            cursor="hand2"
+        )
+        btn.grid(row=y, column=x, padx=1, pady=1)
+
+        # Привязка событий
+        btn.bind("<Button-1>", lambda e: self.game.left_click(x, y))
+        btn.bind("<Button-3>", lambda e: self.game.right_click(x, y))
+        btn.bind("<Button-2>", lambda e: self.game.middle_click(x, y))
+
+        # Эффект наведения
+        btn.bind("<Enter>", lambda e: btn.config(
+            bg=colors['accent'],
+            relief=tk.RAISED
+        ))
+        btn.bind("<Leave>", lambda e: self.update_cell(x, y))
+        return btn
+
+    def update_cell(self, x, y):
+        """Обновить внешний вид кнопки одним вызовом config"""
+        text, fg, bg, revealed = self.cell_style(x, y)
+        self.buttons[y][x].config(
+            text=text,
+            fg=fg,
+            bg=bg,
+            relief=tk.SUNKEN if revealed else tk.RAISED,
+            state=tk.DISABLED if revealed else tk.NORMAL
+        )
+
+    def highlight(self, x, y, text, color):
+        """Выделить кнопку цветом и текстом подсказки"""
+        self.buttons[y][x].config(text=text, bg=color, fg="white")
+
+    def destroy(self):
+        """Удалить все кнопки пула"""
+        self.discard_pending()
+        for row in self.buttons:
+            for btn in row:
+                btn.destroy()
+        self.buttons = []
+        self.width = self.height = 0
+
+
+class CanvasBoardView(BoardView):
+    """Поле на одном холсте с прокруткой и масштабом
+
+    Холст - это окно просмотра: его элементы (прямоугольник и текст)
+    привязаны к позициям окна, а не к клеткам поля. Прокрутка лишь
+    перекрашивает их под другие клетки, поэтому память и время перерисовки
+    зависят от размера окна, а не поля. Элементы живут между партиями:
+    новая партия их сбрасывает, смена размера окна добавляет или прячет разницу.
+    """
+
+    GAP = 2  # Промежуток между клетками в пикселях
+    MIN_CELL = 8  # Пределы масштаба (размер клетки в пикселях)
+    MAX_CELL = 60
+    WHEEL_ROWS = 3  # Строк за один щелчок колесика
+
+    def __init__(self, game, parent):
+        super().__init__(game, parent)
+        self.frame = None
+        self.canvas = None
+        self.slots = []  # Пул пар (прямоугольник, текст) по строкам окна
+        self.cols = self.rows = 0  # Используемые позиции окна (с учетом неполных клеток)
+        self.view_width = self.view_height = 0  # Размер окна в пикселях
+        self.first_col = self.first_row = 0  # Клетка поля в левом верхнем углу окна
+        self.size = 0
+        self.pitch = 0
+        self.hovered = None
+
+    def build(self, width, height):
+        """Подготовить окно просмотра для поля заданного размера"""
+        self.discard_pending()
+        if self.canvas is None:
+            self._create_widgets()
+
+        self.width = width
+        self.height = height
+        self.first_col = self.first_row = 0
+        self.hovered = None
+
+        self._set_cell_size(self.game.cell_size)
+        max_width = self.parent.winfo_screenwidth() - 120
+        max_height = self.parent.winfo_screenheight() - 260
+        view_width = min(width * self.pitch, max_width)
+        view_height = min(height * self.pitch, max_height)
+        self.canvas.config(width=view_width, height=view_height)
+        self._layout(view_width, view_height)
+
+    def _create_widgets(self):
+        """Создать холст, полосы прокрутки и привязать события мыши"""
+        self.frame = tk.Frame(self.parent, bg=self.game.colors['primary'])
+        self.frame.pack(fill=tk.BOTH, expand=True)
+        self.frame.grid_rowconfigure(0, weight=1)
+        self.frame.grid_columnconfigure(0, weight=1)
+
+        self.canvas = tk.Canvas(
+            self.frame,
+            bg=self.game.colors['primary'],
+            highlightthickness=0,
+            bd=0,
+            cursor="hand2"
+        )
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.xbar = tk.Scrollbar(self.frame, orient=tk.HORIZONTAL,
+                                 command=lambda *args: self._on_scrollbar("x", *args))
+        self.ybar = tk.Scrollbar(self.frame, orient=tk.VERTICAL,
+                                 command=lambda *args: self._on_scrollbar("y", *args))
+
+        # Клик переводится в клетку по координатам
+        canvas = self.canvas
+        canvas.bind("<Button-1>", lambda e: self._on_click(e, self.game.left_click))
+        canvas.bind("<Button-3>", lambda e: self._on_click(e, self.game.right_click))
+        canvas.bind("<Button-2>", lambda e: self._on_click(e, self.game.middle_click))
+        canvas.bind("<Motion>", self._on_motion)
+        canvas.bind("<Leave>", lambda e: self._set_hovered(None))
+        canvas.bind("<Configure>", self._on_configure)
+
+        # Колесико - прокрутка, Shift - по горизонтали, Ctrl - масштаб
+        canvas.bind("<MouseWheel>", lambda e: self._on_wheel(e, "y", e.delta))
+        canvas.bind("<Shift-MouseWheel>", lambda e: self._on_wheel(e, "x", e.delta))
+        canvas.bind("<Control-MouseWheel>", lambda e: self._on_wheel(e, "zoom", e.delta))
+        for button, delta in (("4", 120), ("5", -120)):
+            canvas.bind(f"<Button-{button}>", lambda e, d=delta: self._on_wheel(e, "y", d))
+            canvas.bind(f"<Shift-Button-{button}>", lambda e, d=delta: self._on_wheel(e, "x", d))
+            canvas.bind(f"<Control-Button-{button}>", lambda e, d=delta: self._on_wheel(e, "zoom", d))
+
+    def _set_cell_size(self, size):
+        """Сменить масштаб: передвинуть и перешрифтовать элементы пула"""
+        size = max(self.MIN_CELL, min(size, self.MAX_CELL))
+        if size == self.size:
+            return
+        self.size = size
+        self.pitch = size + self.GAP
+        font = self._font()
+        for r, row in enumerate(self.slots):
+            for c, (rect, text) in enumerate(row):
+                left, top = self._origin(c, r)
+                self.canvas.coords(rect, left, top, left + size, top + size)
+                self.canvas.coords(text, left + size // 2, top + size // 2)
+                self.canvas.itemconfigure(text, font=font)
+
+    def _font(self):
+        """Шрифт текста клеток для текущего масштаба"""
+        return ("Arial", max(self.size * 2 // 5, 6), "bold")
+
+    def _origin(self, c, r):
+        """Левый верхний угол позиции окна на холсте"""
+        return c * self.pitch + 1, r * self.pitch + 1
+
+    def _layout(self, view_width, view_height):
+        """Подогнать пул позиций под размер окна и перерисовать его"""
+        old_cols, old_rows = self.cols, self.rows
+        self.view_width = view_width
+        self.view_height = view_height
+        self.cols = min(self.width, view_width // self.pitch + 1)
+        self.rows = min(self.height, view_height // self.pitch + 1)
+        canvas = self.canvas
+
+        # Создаем недостающие позиции
+        while len(self.slots) < self.rows:
+            self.slots.append([])
+        for r in range(self.rows):
+            row = self.slots[r]
+            for c in range(len(row), self.cols):
+                row.append(self._create_slot(c, r))
+
+        # Прячем позиции, вышедшие за пределы окна
+        for r in range(min(old_rows, len(self.slots))):
+            for rect, text in self.slots[r][self.cols if r < self.rows else 0:old_cols]:
+                canvas.itemconfigure(rect, state=tk.HIDDEN)
+                canvas.itemconfigure(text, state=tk.HIDDEN)
+        for r in range(self.rows):
+            for c, (rect, text) in enumerate(self.slots[r][:self.cols]):
+                if c >= old_cols or r >= old_rows:
+                    canvas.itemconfigure(rect, state=tk.NORMAL)
+                    canvas.itemconfigure(text, state=tk.NORMAL)
+
+        self._scroll_to(self.first_col, self.first_row, force=True)
+
+    def _create_slot(self, c, r):
+        """Создать прямоугольник и текст новой позиции окна"""
+        size = self.size
+        left, top = self._origin(c, r)
+        rect = self.canvas.create_rectangle(left, top, left + size, top + size)
+        text = self.canvas.create_text(
+            left + size // 2, top + size // 2,
+            text="",
+            font=self._font()
+        )
+        return rect, text
+
+    def _visible_span(self):
+        """Сколько клеток целиком помещается в окне по горизонтали и вертикали"""
+        return (max(min(self.view_width // self.pitch, self.width), 1),
+                max(min(self.view_height // self.pitch, self.height), 1))
+
+    def _scroll_to(self, col, row, force=False):
+        """Показать поле начиная с клетки (col, row)"""
+        span_x, span_y = self._visible_span()
+        col = max(0, min(col, self.width - span_x))
+        row = max(0, min(row, self.height - span_y))
+        if not force and (col, row) == (self.first_col, self.first_row):
+            return
+        self.first_col, self.first_row = col, row
+        self.hovered = None
+        self.redraw()
+
+        # Полосы прокрутки нужны, только если поле не помещается в окно
+        for bar, first, span, total, place in (
+                (self.xbar, col, span_x, self.width, dict(row=1, column=0, sticky="ew")),
+                (self.ybar, row, span_y, self.height, dict(row=0, column=1, sticky="ns"))):
+            if span < total:
+                bar.set(first / total, (first + span) / total)
+                bar.grid(**place)
+            else:
+                bar.grid_remove()
+
+    def center_on(self, x, y):
+        """Прокрутить окно так, чтобы клетка (x, y) оказалась в центре"""
+        span_x, span_y = self._visible_span()
+        self._scroll_to(x - span_x // 2, y - span_y // 2)
+
+    def _on_scrollbar(self, axis, action, amount, unit=None):
+        """Обработать команду полосы прокрутки (moveto/scroll)"""
+        span_x, span_y = self._visible_span()
+        total, first, span = ((self.width, self.first_col, span_x) if axis == "x"
+                              else (self.height, self.first_row, span_y))
+        if action == "moveto":
+            first = int(float(amount) * total)
+        else:
+            first += int(amount) * (span if unit == "pages" else 1)
+        if axis == "x":
+            self._scroll_to(first, self.first_row)
+        else:
+            self._scroll_to(self.first_col, first)
+
+    def _on_wheel(self, event, axis, delta):
+        """Прокрутка колесиком мыши или масштаб с Ctrl"""
+        steps = 1 if delta > 0 else -1
+        if axis == "zoom":
+            # Клетка под курсором остается на месте
+            anchor_x = self.first_col + event.x // self.pitch
+            anchor_y = self.first_row + event.y // self.pitch
+            self._set_cell_size(self.size + 4 * steps)
+            self.first_col = anchor_x - event.x // self.pitch
+            self.first_row = anchor_y - event.y // self.pitch
+            self._layout(self.view_width, self.view_height)
+        elif axis == "x":
+            self._scroll_to(self.first_col - steps * self.WHEEL_ROWS, self.first_row)
+        else:
+            self._scroll_to(self.first_col, self.first_row - steps * self.WHEEL_ROWS)
+        return "break"
+
+    def _on_configure(self, event):
+        """Окно игры изменило размер - подстраиваем окно просмотра"""
+        if (event.width, event.height) != (self.view_width, self.view_height):
+            self._layout(event.width, event.height)
+
+    def cell_at(self, event):
+        """Координаты клетки под курсором или None"""
+        x = self.first_col + event.x // self.pitch
+        y = self.first_row + event.y // self.pitch
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return x, y
+        return None
+
+    def _on_click(self, event, handler):
+        cell = self.cell_at(event)
+        if cell is not None:
+            handler(*cell)
+
+    def _on_motion(self, event):
+        self._set_hovered(self.cell_at(event))
+
+    def _set_hovered(self, cell):
+        """Подсветить закрытую клетку под курсором"""
+        if cell == self.hovered:
+            return
+        previous, self.hovered = self.hovered, cell
+        if previous is not None:
+            self.update_cell(*previous)
+        if cell is not None and not self.game.engine.is_revealed(*cell):
+            slot = self._slot(*cell)
+            if slot is not None:
+                self.canvas.itemconfigure(slot[0], fill=self.game.colors['accent'])
+
+    def _slot(self, x, y):
+        """Элементы холста, показывающие клетку, или None, если она вне окна"""
+        c = x - self.first_col
+        r = y - self.first_row
+        if 0 <= c < self.cols and 0 <= r < self.rows:
+            return self.slots[r][c]
+        return None
+
+    def visible_count(self):
+        """Сколько позиций окна отображается на экране"""
+        return self.cols * self.rows
+
+    def redraw(self):
+        """Перерисовать все позиции окна"""
+        for r in range(self.rows):
+            y = self.first_row + r
+            for c in range(self.cols):
+                self._draw(self.first_col + c, y, self.slots[r][c])
+
+    def update_cell(self, x, y):
+        """Обновить клетку, если она видна в окне"""
+        slot = self._slot(x, y)
+        if slot is not None:
+            self._draw(x, y, slot)
+
+    def _draw(self, x, y, slot):
+        """Раскрасить позицию окна по состоянию клетки (x, y)"""
+        rect, text_item = slot
+        if x >= self.width or y >= self.height:
+            # Неполная позиция у края поля
+            self.canvas.itemconfigure(rect, fill=self.game.colors['primary'], outline="")
+            self.canvas.itemconfigure(text_item, text="")
+            return
+        text, fg, bg, revealed = self.cell_style(x, y)
+        colors = self.game.colors
+        self.canvas.itemconfigure(
+            rect,
+            fill=bg,
+            outline=colors['secondary'] if revealed else colors['dark']
+        )
+        self.canvas.itemconfigure(text_item, text=text, fill=fg)
+
+    def highlight(self, x, y, text, color):
+        """Выделить клетку, если она видна в окне"""
+        slot = self._slot(x, y)
+        if slot is not None:
+            self.canvas.itemconfigure(slot[0], fill=color)
+            self.canvas.itemconfigure(slot[1], text=text, fill="white")
+
+    def destroy(self):
+        """Удалить холст вместе со всем пулом"""
+        self.discard_pending()
+        if self.frame is not None:
+            self.frame.destroy()
+        self.frame = self.canvas = None
+        self.slots = []
+        self.cols = self.rows = 0
+        self.view_width = self.view_height = 0
+        self.size = self.pitch = 0
+        self.width = self.height = 0
+        self.hovered = None
+
+
+# Доступные отрисовщики поля по имени настройки
+BOARD_VIEWS = {
+    "canvas": CanvasBoardView,
+    "buttons": ButtonBoardView,
+}
@@ -0,0 +1,406 @@
+"""Самопроверка движка: python checks.py
+
+Вероятности ProbabilityEngine и выводы ConstraintSolver сверяются с полным
+перебором расстановок мин на маленьких полях; открытие больших пустых областей
+через NumPy - с обычным обходом; снимки партий и повторы
+проходят сохранение и загрузку (снимки - с NumPy и без него), журнал ходов -
+восстановление после обрыва записи, база рекордов - перенос старых данных
+и проверку записей повторами.
+"""
+import io
+import itertools
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import zlib
+
+import engine
+import snapshot
+from engine import FLAGGED, MINE, NEIGHBORS_MASK, REVEALED, MinesweeperEngine
+from journal import MoveJournal, recover
+from records import BackgroundWriter, SQLiteRecordStore, board_key, open_record_store
+from replay import CHORD, FLAG, MAGIC, REVEAL, Replay, ReplayRecorder, replay_moves, write_varint
+from solver import ConstraintSolver, ProbabilityEngine
+from verify import verify_record, verify_replay_bytes
+
+
+def brute_force_probabilities(game):
+    """Доля мин в каждой закрытой клетке по всем расстановкам, согласным с полем"""
+    cells = game.cells
+    hidden = [i for i in range(len(cells)) if not cells[i] & REVEALED]
+    revealed = [i for i in range(len(cells)) if cells[i] & REVEALED]
+    flagged = [i for i in hidden if cells[i] & FLAGGED]
+    hits = dict.fromkeys(hidden, 0)
+    total = 0
+    for combo in itertools.combinations(hidden, game.mine_count):
+        mines = set(combo)
+        if not mines.issuperset(flagged):
+            continue
+        if all(sum(j in mines for j in game.neighbor_indices(i)) == cells[i] & NEIGHBORS_MASK
+               for i in revealed):
+            total += 1
+            for i in combo:
+                hits[i] += 1
+    return {i: hits[i] / total for i in hidden}
+
+
+def random_position(seed):
+    """Партия 5x5 после первого хода, нескольких безопасных ходов и верного флага"""
+    rng = random.Random(seed)
+    game = MinesweeperEngine(5, 5, 6, seed=seed)
+    game.reveal(2, 2)
+    for _ in range(rng.randrange(3)):
+        safe = [i for i in range(len(game.cells)) if not game.cells[i] & (MINE | REVEALED)]
+        if game.game_over or not safe:
+            break
+        y, x = divmod(rng.choice(safe), game.width)
+        game.reveal(x, y)
+    if not game.game_over and rng.random() < 0.5:
+        y, x = divmod(rng.choice(game.mines), game.width)
+        game.toggle_flag(x, y)
+    return game
+
+
+def check_solver(boards=140):
+    """Сверить решатель и вероятности с перебором; список расхождений"""
+    errors = []
+    for seed in range(boards):
+        game = random_position(seed)
+        if game.game_over:
+            continue
+        solver = ConstraintSolver(game)
+        probabilities = ProbabilityEngine(solver).probabilities()
+        for i, expected in brute_force_probabilities(game).items():
+            if abs(probabilities[i] - expected) > 1e-9:
+                errors.append(f"поле {seed}, клетка {i}: {probabilities[i]} вместо {expected}")
+            if i in solver.safe and expected != 0:
+                errors.append(f"поле {seed}, клетка {i}: решатель счел безопасной")
+            if i in solver.mines and expected != 1:
+                errors.append(f"поле {seed}, клетка {i}: решатель счел миной")
+    return errors
+
+
+def flood_fill_game(seed, use_numpy, budget):
+    """Клетки и изменения ходов случайной партии при заданном пороге FLOOD_BUDGET"""
+    numpy, saved = engine.np, engine.FLOOD_BUDGET
+    engine.np = numpy if use_numpy else None
+    engine.FLOOD_BUDGET = budget
+    try:
+        rng = random.Random(seed)
+        width, height = rng.randrange(5, 120), rng.randrange(5, 120)
+        game = MinesweeperEngine(width, height, max(1, width * height // rng.choice((8, 20, 60, 200))),
+                                 seed=seed)
+        for _ in range(seed % 30):
+            game.toggle_flag(rng.randrange(width), rng.randrange(height))
+        changes = []
+        for _ in range(6):
+            changes.append(sorted(game.reveal(rng.randrange(width), rng.randrange(height)).changed))
+            if game.game_over:
+                break
+            changes.append(sorted(game.chord(rng.randrange(width), rng.randrange(height)).changed))
+        return bytes(game.cells), changes, game.revealed_count, game.safe_remaining, game.game_over
+    finally:
+        engine.np, engine.FLOOD_BUDGET = numpy, saved
+
+
+def check_flood_fill(boards=120):
+    """Открытие области через NumPy совпадает с обычным обходом"""
+    if engine.np is None:
+        return []
+    return [f"поле {seed}: открытие через NumPy отличается от обычного"
+            for seed in range(boards)
+            if flood_fill_game(seed, False, engine.FLOOD_BUDGET) != flood_fill_game(seed, True, seed % 7)]
+
+
+def played_game(width, height, mines, seed, moves=30):
+    """Партия после первого хода и нескольких случайных ходов и флагов"""
+    rng = random.Random(seed)
+    game = MinesweeperEngine(width, height, mines, seed=seed)
+    game.reveal(width // 2, height // 2)
+    for _ in range(moves):
+        if game.game_over:
+            break
+        x, y = rng.randrange(width), rng.randrange(height)
+        if rng.random() < 0.3:
+            game.toggle_flag(x, y)
+        elif not game.cells[y * width + x] & MINE:
+            game.reveal(x, y)
+    return game
+
+
+def _resave(data, header):
+    """Снимок с другим заголовком и пересчитанной контрольной суммой"""
+    size = len(snapshot.MAGIC) + snapshot.HEADER.size
+    body = snapshot.MAGIC + header + data[size:-snapshot.CHECKSUM.size]
+    return body + snapshot.CHECKSUM.pack(zlib.crc32(body))
+
+
+def check_snapshots():
+    """Снимок -> загрузка дает ту же партию; испорченный снимок отвергается"""
+    errors = []
+    numpy = engine.np
+    for np in ((numpy, None) if numpy is not None else (None,)):
+        engine.np = snapshot.np = np
+        try:
+            for seed, size in enumerate(((9, 9, 10), (30, 16, 99), (7, 3, 5), (200, 150, 4000))):
+                game = played_game(*size, seed)
+                data = snapshot.dump(game, 1234, "custom", b"extra")
+                loaded, elapsed_ms, level, extra = snapshot.load(data)
+                loaded.mines.sort()
+                game.mines.sort()  # Порядок мин в движке - порядок их расстановки
+                fields = ("cells", "mines", "revealed_count", "flags_placed", "flags_correct",
+                          "safe_remaining", "first_move")
+                for field in fields:
+                    if getattr(loaded, field) != getattr(game, field):
+                        errors.append(f"снимок {size} (NumPy: {np is not None}): не совпало {field}")
+                if (elapsed_ms, level, extra) != (1234, "custom", b"extra"):
+                    errors.append(f"снимок {size}: не совпали доп. данные")
+        finally:
+            engine.np = snapshot.np = numpy
+
+    data = snapshot.dump(played_game(9, 9, 10, 0), 0, "easy")
+    damaged = {
+        "испорченный байт": data[:20] + bytes([data[20] ^ 1]) + data[21:],
+        "обрезанный файл": data[:-5],
+        "нулевая ширина": _resave(data, snapshot.HEADER.pack(0, 9, 10, 0, 0, 4, 0)),
+        "огромное поле": _resave(data, snapshot.HEADER.pack(2 ** 31, 2 ** 31, 10, 0, 0, 4, 0)),
+        "мин больше клеток": _resave(data, snapshot.HEADER.pack(9, 9, 81, 0, 0, 4, 0)),
+    }
+    for name, bad in damaged.items():
+        try:
+            snapshot.load(bad)
+            errors.append(f"снимок ({name}) загружен без ошибки")
+        except ValueError:
+            pass
+    return errors
+
+
+def recorded_game(width, height, mines, seed, moves=60):
+    """Случайная партия и ее запись: (движок, ReplayRecorder)"""
+    rng = random.Random(seed)
+    game = MinesweeperEngine(width, height, mines, seed=seed)
+    recorder = ReplayRecorder()
+    actions = (game.reveal, game.toggle_flag, game.chord)
+    time_ms = 0
+    for move in range(moves):
+        if game.game_over:
+            break
+        action = REVEAL if move == 0 else rng.choice((REVEAL, REVEAL, FLAG, CHORD))
+        index = rng.randrange(width * height)
+        time_ms += rng.choice((0, 5, 130, 20000))
+        recorder.record(action, index, time_ms)
+        y, x = divmod(index, width)
+        actions[action](x, y)
+    return game, recorder
+
+
+def _header(*values):
+    data = bytearray(MAGIC)
+    for value in values:
+        write_varint(data, value)
+    return bytes(data)
+
+
+def check_replays():
+    """Повтор проигрывается в ту же партию; испорченный повтор отвергается"""
+    errors = []
+    for seed, size in enumerate(((9, 9, 10), (30, 16, 99), (200, 150, 4000))):
+        game, recorder = recorded_game(*size, seed)
+        data = recorder.to_bytes(*size, seed)
+        replay = Replay(io.BytesIO(data))
+        if (replay.width, replay.height, replay.mine_count, replay.seed) != (*size, seed):
+            errors.append(f"повтор {size}: не совпал заголовок")
+        copy = MinesweeperEngine(*size, seed=seed)
+        for _ in replay_moves(copy, replay.moves()):
+            pass
+        if copy.cells != game.cells or copy.game_over != game.game_over:
+            errors.append(f"повтор {size}: партия проиграна иначе")
+        restored = ReplayRecorder()
+        restored.restore(recorder.moves)
+        if (restored.move_count, restored.last_ms) != (recorder.move_count, recorder.last_ms):
+            errors.append(f"повтор {size}: ReplayRecorder.restore не совпал с записью")
+
+    game, recorder = recorded_game(9, 9, 10, 0)
+    data = recorder.to_bytes(9, 9, 10, 0)
+    damaged = {
+        "чужая сигнатура": b"XXXX" + data[4:],
+        "обрезанный заголовок": data[:6],
+        "обрезанный ход": data[:-1] + bytes([data[-1] | 0x80]),
+        "нулевая ширина": _header(0, 9, 10, 0),
+        "огромное поле": _header(2 ** 40, 2 ** 40, 10, 0),
+        "мин больше клеток": _header(9, 9, 81, 0),
+        "ход вне поля": _header(9, 9, 10, 0) + bytes([0x80, 0x80, 0x01, 0]),
+    }
+    for name, bad in damaged.items():
+        try:
+            replay = Replay(io.BytesIO(bad))
+            for _ in replay_moves(MinesweeperEngine(9, 9, 10, seed=0), replay.moves()):
+                pass
+            errors.append(f"повтор ({name}) прочитан без ошибки")
+        except ValueError:
+            pass
+    return errors
+
+
+def check_journal():
+    """Журнал восстанавливает партию, в том числе с оборванным последним ходом"""
+    errors = []
+    game, recorder = recorded_game(30, 16, 99, 7)
+    moves = bytes(recorder.moves)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "journal.msr")
+        writer = BackgroundWriter("journal-writer")
+        journal = MoveJournal(path, writer)
+        journal.start(30, 16, 99, 1)  # Партия, замененная следующей
+        journal.append(moves[:10])
+        journal.start(30, 16, 99, 7, moves[:len(moves) // 2])
+        journal.append(moves[len(moves) // 2:])
+        journal.close()
+        writer.close()
+        if writer.last_error is not None:
+            errors.append(f"журнал: ошибка записи {writer.last_error}")
+
+        restored, restored_recorder = recover(path)
+        if restored.cells != game.cells or bytes(restored_recorder.moves) != moves:
+            errors.append("журнал: восстановленная партия не совпала с сыгранной")
+
+        with open(path, 'r+b') as f:
+            f.truncate(os.path.getsize(path) - 1)
+        restored, restored_recorder = recover(path)
+        expected = ReplayRecorder()  # Все ходы, кроме оборванного последнего
+        all_moves = list(Replay(io.BytesIO(recorder.to_bytes(30, 16, 99, 7))).moves())
+        for action, index, time_ms in all_moves[:-1]:
+            expected.record(action, index, time_ms)
+        copy = MinesweeperEngine(30, 16, 99, seed=7)
+        for _ in replay_moves(copy, Replay(io.BytesIO(expected.to_bytes(30, 16, 99, 7))).moves()):
+            pass
+        if restored.cells != copy.cells or restored_recorder.moves != expected.moves:
+            errors.append("журнал: после обрыва восстановлено не то, что было до последнего хода")
+    return errors
+
+
+def won_game(seed):
+    """Выигранная партия «Новичок»: (повтор в байтах, время победы в мс)"""
+    game = MinesweeperEngine(9, 9, 10, seed=seed)
+    recorder = ReplayRecorder()
+    game.reveal(4, 4)
+    recorder.record(REVEAL, 4 * 9 + 4, 0)
+    time_ms = 0
+    for i in range(81):
+        if not game.cells[i] & (MINE | REVEALED):
+            time_ms += 250
+            recorder.record(REVEAL, i, time_ms)
+            game.reveal(i % 9, i // 9)
+    assert game.game_over and game.safe_remaining == 0
+    return recorder.to_bytes(9, 9, 10, seed), time_ms
+
+
+def _game(name, time_ms, **fields):
+    return dict({"name": name, "difficulty": "easy", "width": 9, "height": 9, "mines": 10,
+                 "time_ms": time_ms, "date": "2024-01-01 12:00:00", "seed": None, "won": True},
+                **fields)
+
+
+def check_records():
+    """Перенос старой базы и JSON, состав таблиц рекордов и проверка записей"""
+    errors = []
+    key = board_key(9, 9, 10)
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, "records.db")
+        # База версии 2: рекорды без повторов, перенесенные из JSON
+        connection = sqlite3.connect(db_path)
+        connection.executescript("""
+            CREATE TABLE games (id INTEGER PRIMARY KEY, player TEXT NOT NULL,
+                difficulty TEXT NOT NULL, width INTEGER, height INTEGER, mines INTEGER,
+                time_ms INTEGER NOT NULL, date TEXT NOT NULL, seed TEXT, won INTEGER NOT NULL);
+            INSERT INTO games VALUES (1, 'старый', 'easy', 9, 9, 10, 5000, '2020-01-01', NULL, 1);
+            PRAGMA user_version = 2;
+        """)
+        connection.close()
+
+        data, time_ms = won_game(3)
+        replay_path = os.path.join(directory, "won.msr")
+        with open(replay_path, 'wb') as f:
+            f.write(data)
+        claim = _game("проверенный", time_ms, seed=3, replay=replay_path)
+        if verify_replay_bytes(data, claim) != (True, ""):
+            errors.append(f"рекорды: выигранный повтор не подтвержден {verify_replay_bytes(data, claim)}")
+        if verify_replay_bytes(data, dict(claim, time_ms=time_ms - 1))[0]:
+            errors.append("рекорды: подтвержден повтор с чужим временем")
+
+        store = SQLiteRecordStore(db_path)
+        store.add_game(dict(claim, verified=True))
+        store.add_game(_game("непроверенный", 100))
+        store.close()
+        connection = sqlite3.connect(db_path)
+        connection.execute(  # Подделка: победа без повтора, выданная за проверенную
+            "INSERT INTO games (player, difficulty, width, height, mines, time_ms, date, won,"
+            " verified) VALUES ('подделка', 'easy', 9, 9, 10, 50, '2024-01-01', 1, 1)")
+        connection.commit()
+        connection.close()
+
+        store = open_record_store(db_path, None, read_only=True)
+        top = {record["name"]: record for record in store.top(key)}
+        store.close()
+        if sorted(top) != ["проверенный", "старый"]:
+            errors.append(f"рекорды: в таблице {sorted(top)} вместо проверенной и старой записей")
+        else:
+            if not top["старый"]["legacy"] or top["проверенный"]["legacy"]:
+                errors.append("рекорды: пометка legacy перенесена неверно")
+            results = {
+                "старая запись": (verify_record(top["старый"])[0], None),
+                "проверенная запись": (verify_record(top["проверенный"])[0], True),
+                "запись без повтора и пометки": (
+                    verify_record(dict(top["старый"], legacy=False))[0], False),
+                "запись с измененным временем": (
+                    verify_record(dict(top["проверенный"], time_ms=time_ms - 1))[0], False),
+            }
+            for name, (result, expected) in results.items():
+                if result is not expected:
+                    errors.append(f"рекорды: {name} - результат проверки {result}, нужен {expected}")
+
+        # Перенос JSON старого формата в новую базу
+        json_path = os.path.join(directory, "records.json")
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({"easy": [{"name": "json", "time": 7.5, "date": "2020-01-01"}]}, f)
+        store = SQLiteRecordStore(os.path.join(directory, "new.db"), json_path)
+        imported = store.top(key)
+        store.close()
+        if [(r["name"], r["time_ms"], r["legacy"]) for r in imported] != [("json", 7500, True)]:
+            errors.append(f"рекорды: JSON перенесен неверно {imported}")
+
+        missing = os.path.join(directory, "missing.db")
+        try:
+            open_record_store(missing, None, read_only=True)
+            errors.append("рекорды: отсутствующая база открыта для чтения")
+        except FileNotFoundError:
+            pass
+        if os.path.exists(missing):
+            errors.append("рекорды: открытие для чтения создало файл базы")
+    return errors
+
+
+def main():
+    failed = 0
+    checks = (
+        ("решатель и вероятности", check_solver),
+        ("открытие больших областей", check_flood_fill),
+        ("снимки партий", check_snapshots),
+        ("повторы", check_replays),
+        ("журнал ходов", check_journal),
+        ("база рекордов и проверка повторами", check_records),
+    )
+    for name, check in checks:
+        errors = check()
+        failed += len(errors)
+        for error in errors:
+            print(f"❌ {error}")
+        print(f"{'✅' if not errors else '❌'} {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
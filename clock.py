@@ -0,0 +1,80 @@
+"""Игровые часы: одна цепочка обновлений и точное время партии"""
+import time
+
+
+class GameClock:
+    """Секундомер партии на time.perf_counter с одним отменяемым тиком root.after
+
+    Время копится в миллисекундах и не идет, пока часы на паузе
+    (например, когда окно игры потеряло фокус).
+    """
+
+    def __init__(self, root, on_tick):
+        self.root = root
+        self.on_tick = on_tick  # Вызывается с прошедшим временем в миллисекундах
+        self.job = None
+        self.reset()
+
+    def reset(self):
+        """Остановить часы и обнулить время"""
+        self._cancel()
+        self.accumulated = 0.0  # Секунды, набранные до последней паузы
+        self.started_at = None  # Момент последнего запуска, если часы идут
+        self.running = False  # Партия идет (часы могут быть на паузе)
+
+    def start(self):
+        """Запустить отсчет партии"""
+        self.running = True
+        self.resume()
+
+    def restore(self, elapsed_ms):
+        """Продолжить отсчет сохраненной партии с elapsed_ms"""
+        self.reset()
+        self.accumulated = elapsed_ms / 1000
+        self.start()
+
+    def stop(self):
+        """Остановить отсчет в конце партии"""
+        self.pause()
+        self.running = False
+
+    def pause(self):
+        """Приостановить отсчет, сохранив набранное время"""
+        if self.started_at is not None:
+            self.accumulated += time.perf_counter() - self.started_at
+            self.started_at = None
+        self._cancel()
+
+    def resume(self):
+        """Продолжить отсчет после паузы"""
+        if self.running and self.started_at is None:
+            self.started_at = time.perf_counter()
+            self._tick()
+
+    def elapsed_ms(self):
+        """Прошедшее время партии в миллисекундах"""
+        elapsed = self.accumulated
+        if self.started_at is not None:
+            elapsed += time.perf_counter() - self.started_at
+        return int(elapsed * 1000)
+
+    def _tick(self):
+        """Сообщить время и запланировать следующий тик на границе секунды"""
+        elapsed_ms = self.elapsed_ms()
+        self.on_tick(elapsed_ms)
+        self.job = self.root.after(1000 - elapsed_ms % 1000, self._tick)
+
+    def _cancel(self):
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+
+
+def format_seconds(time_ms):
+    """Время в миллисекундах -> строка секунд с тремя знаками после точки"""
+    return f"{time_ms // 1000}.{time_ms % 1000:03d}"
+
+
+def record_time_ms(record):
+    """Время рекорда в миллисекундах (старые записи хранят только целые секунды)"""
+    return record.get("time_ms", record["time"] * 1000)
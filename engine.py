@@ -0,0 +1,381 @@
+"""Игровая логика Сапера без графического интерфейса"""
+import random
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError:  # NumPy необязателен: без него работает версия на чистом Python
+    np = None
+
+# Упаковка клетки в один байт: младшие 4 бита - число соседей-мин, старшие - флаги
+NEIGHBORS_MASK = 0x0F
+MINE = 0x10
+REVEALED = 0x20
+FLAGGED = 0x40
+
+# Таблица для bytes.translate: обнуляет счетчик соседей, сохраняя флаги
+_CLEAR_NEIGHBORS = bytes(b & ~NEIGHBORS_MASK for b in range(256))
+
+# Сколько клеток заливка открывает по одной, прежде чем (при наличии NumPy)
+# перейти к заливке целыми отрезками строк
+FLOOD_BUDGET = 4096
+
+
+@dataclass
+class MoveResult:
+    """Результат хода: изменившиеся клетки и исход игры"""
+    changed: list = field(default_factory=list)  # Индексы клеток (y * width + x) для перерисовки
+    started: bool = False  # Ход сгенерировал мины (первый ход партии)
+    exploded: bool = False  # Открыта мина - поражение
+    won: bool = False  # Ход привел к победе
+
+
+def place_mines(width, height, mine_count, safe_x, safe_y, seed=None):
+    """Выбрать индексы мин вне квадрата 3x3 вокруг первого хода
+
+    Частичная перетасовка Фишера-Йетса по номерам разрешенных клеток:
+    перестановки хранятся в словаре, поэтому время и память - O(mine_count)
+    при любой плотности мин.
+    """
+    safe_cells = sorted(
+        ny * width + nx
+        for ny in range(max(safe_y - 1, 0), min(safe_y + 2, height))
+        for nx in range(max(safe_x - 1, 0), min(safe_x + 2, width))
+    )
+    free_count = width * height - len(safe_cells)
+    if not 0 <= mine_count <= free_count:
+        raise ValueError(f"На поле {width}x{height} помещается не больше {free_count} мин")
+
+    rng = random.Random(seed)
+    swaps = {}
+    mines = []
+    for k in range(mine_count):
+        r = rng.randrange(k, free_count)
+        picked = swaps.get(r, r)
+        swaps[r] = swaps.get(k, k)
+
+        # Номер среди разрешенных клеток -> индекс на поле (пропускаем безопасные)
+        for i in safe_cells:
+            if i <= picked:
+                picked += 1
+            else:
+                break
+        mines.append(picked)
+    return mines
+
+
+def count_neighbors(cells, width, height, mines):
+    """Записать в младшие биты клеток количество соседей-мин
+
+    С NumPy вся сетка считается сразу - суммой восьми сдвигов дополненной
+    нулями маски мин. Без NumPy каждая мина увеличивает счетчики своих соседей.
+    """
+    if np is not None:
+        grid = np.frombuffer(cells, dtype=np.uint8).reshape(height, width)
+        padded = np.zeros((height + 2, width + 2), dtype=np.uint8)
+        padded[1:-1, 1:-1] = (grid & MINE) >> 4
+        counts = np.zeros((height, width), dtype=np.uint8)
+        for dy in range(3):
+            for dx in range(3):
+                if dy != 1 or dx != 1:
+                    counts += padded[dy:dy + height, dx:dx + width]
+        grid &= ~NEIGHBORS_MASK & 0xFF
+        grid |= counts
+        return
+
+    cells[:] = cells.translate(_CLEAR_NEIGHBORS)
+    for i in mines:
+        y, x = divmod(i, width)
+        for ny in range(max(y - 1, 0), min(y + 2, height)):
+            row = ny * width
+            for j in range(row + max(x - 1, 0), row + min(x + 2, width)):
+                if j != i:
+                    cells[j] += 1
+
+
+class MinesweeperEngine:
+    """Состояние партии и правила игры, не зависящие от Tkinter"""
+
+    def __init__(self, width=9, height=9, mine_count=10, seed=None):
+        self.width = width
+        self.height = height
+        self.mine_count = mine_count
+        self.reset(seed=seed)
+
+    def reset(self, width=None, height=None, mine_count=None, seed=None):
+        """Начать новую партию (при необходимости с другими параметрами)
+
+        Без seed берется случайное зерно, чтобы любую партию можно было повторить.
+        """
+        if width is not None:
+            self.width = width
+        if height is not None:
+            self.height = height
+        if mine_count is not None:
+            self.mine_count = mine_count
+        self.seed = seed if seed is not None else random.getrandbits(64)
+
+        self.game_over = False
+        self.game_won = False
+        self.first_move = True
+        self.flags_placed = 0
+        self.revealed_count = 0
+
+        # Счетчики для проверки победы за O(1)
+        self.flags_correct = 0  # Флаги, стоящие на минах
+        self.safe_remaining = self.width * self.height - self.mine_count  # Неоткрытые клетки без мин
+
+        # Поле хранится плоским массивом байт, клетка (x, y) - по индексу y * width + x
+        self.cells = bytearray(self.width * self.height)
+        self.mines = []
+
+    def index(self, x, y):
+        """Индекс клетки в плоском массиве"""
+        return y * self.width + x
+
+    def is_mine(self, x, y):
+        """Есть ли в клетке мина"""
+        return bool(self.cells[y * self.width + x] & MINE)
+
+    def is_revealed(self, x, y):
+        """Открыта ли клетка"""
+        return bool(self.cells[y * self.width + x] & REVEALED)
+
+    def is_flagged(self, x, y):
+        """Стоит ли на клетке флаг"""
+        return bool(self.cells[y * self.width + x] & FLAGGED)
+
+    def neighbors(self, x, y):
+        """Количество мин в соседних клетках"""
+        return self.cells[y * self.width + x] & NEIGHBORS_MASK
+
+    def generate_mines(self, safe_x, safe_y):
+        """Сгенерировать мины, избегая безопасных клеток"""
+        cells = self.cells
+        self.mines = place_mines(
+            self.width, self.height, self.mine_count, safe_x, safe_y, self.seed
+        )
+        for i in self.mines:
+            cells[i] |= MINE
+
+        # Флаги могли быть поставлены до первого хода
+        self.flags_correct = sum(1 for i in self.mines if cells[i] & FLAGGED)
+
+        count_neighbors(cells, self.width, self.height, self.mines)
+
+    def reveal(self, x, y):
+        """Открыть клетку (левый клик)"""
+        result = MoveResult()
+        self._reveal(self.index(x, y), result)
+        self._update_win(result)
+        return result
+
+    def toggle_flag(self, x, y):
+        """Поставить или снять флаг (правый клик)"""
+        result = MoveResult()
+        i = self.index(x, y)
+        if self.game_over or self.cells[i] & REVEALED:
+            return result
+
+        cell = self.cells[i] ^ FLAGGED
+        self.cells[i] = cell
+        delta = 1 if cell & FLAGGED else -1
+        self.flags_placed += delta
+        if cell & MINE:
+            self.flags_correct += delta
+        result.changed.append(i)
+
+        self._update_win(result)
+        return result
+
+    def chord(self, x, y):
+        """Открыть соседей числа, если вокруг достаточно флагов (средний клик)"""
+        result = MoveResult()
+        i = self.index(x, y)
+        cell = self.cells[i]
+        if self.game_over or not cell & REVEALED or not cell & NEIGHBORS_MASK:
+            return result
+
+        cells = self.cells
+        neighbors = self.neighbor_indices(i)
+        flag_count = sum(1 for j in neighbors if cells[j] & FLAGGED)
+
+        # Если флагов столько же, сколько соседей-мин
+        if flag_count == cell & NEIGHBORS_MASK:
+            for j in neighbors:
+                self._reveal(j, result)
+
+        self._update_win(result)
+        return result
+
+    def iter_neighbors(self, x, y):
+        """Перебрать координаты соседних клеток в пределах поля"""
+        for dy in range(-1, 2):
+            for dx in range(-1, 2):
+                if dx == 0 and dy == 0:
+                    continue
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < self.width and 0 <= ny < self.height:
+                    yield nx, ny
+
+    def neighbor_indices(self, i):
+        """Индексы соседних клеток в пределах поля"""
+        width = self.width
+        y, x = divmod(i, width)
+        x0 = x - 1 if x > 0 else x
+        x1 = x + 2 if x < width - 1 else x + 1
+        result = []
+        if y > 0:
+            result.extend(range(i - width - x + x0, i - width - x + x1))
+        if x > 0:
+            result.append(i - 1)
+        if x < width - 1:
+            result.append(i + 1)
+        if y < self.height - 1:
+            result.extend(range(i + width - x + x0, i + width - x + x1))
+        return result
+
+    def _reveal(self, i, result):
+        """Открыть клетку и записать изменения в результат хода"""
+        cells = self.cells
+        if self.game_over or cells[i] & (REVEALED | FLAGGED):
+            return
+
+        # Первый ход - генерация мин
+        if self.first_move:
+            y, x = divmod(i, self.width)
+            self.generate_mines(x, y)
+            self.first_move = False
+            result.started = True
+
+        cells[i] |= REVEALED
+        self.revealed_count += 1
+        result.changed.append(i)
+
+        # Если мина - поражение
+        if cells[i] & MINE:
+            self.game_over = True
+            result.exploded = True
+            self.reveal_all_mines(result)
+            return
+        self.safe_remaining -= 1
+
+        # Если пустая клетка - открываем соседей
+        if not cells[i] & NEIGHBORS_MASK:
+            self.reveal_neighbors(i, result)
+
+    def reveal_neighbors(self, i, result):
+        """Открыть область вокруг пустой клетки
+
+        Заливка идет по явному стеку, поэтому не упирается в предел рекурсии
+        на полях любого размера; все открытые клетки попадают в result.changed.
+        Если область оказалась больше FLOOD_BUDGET клеток, остаток стека
+        доливается на NumPy (_reveal_region).
+        """
+        cells = self.cells
+        width = self.width
+        size = len(cells)
+        changed = result.changed
+        start = len(changed)
+        stack = [i]
+        while stack:
+            if np is not None and len(changed) - start > FLOOD_BUDGET:
+                self._reveal_region(stack, changed)
+                break
+            i = stack.pop()
+            x = i % width
+            lo = i - 1 if x > 0 else i
+            hi = i + 2 if x < width - 1 else i + 1
+            for row in (i - width, i, i + width):
+                if row < 0 or row >= size:
+                    continue
+                for j in range(lo + row - i, hi + row - i):
+                    cell = cells[j]
+                    if not cell & (REVEALED | FLAGGED):
+                        cells[j] = cell | REVEALED
+                        changed.append(j)
+                        if not cell & NEIGHBORS_MASK:
+                            stack.append(j)
+        self.revealed_count += len(changed) - start
+        self.safe_remaining -= len(changed) - start
+
+    def _reveal_region(self, seeds, changed):
+        """Долить область с открытых пустых клеток seeds целыми отрезками строк
+
+        Закрытые пустые клетки без флагов каждой строки режутся на отрезки;
+        отрезки соседних строк, касающиеся хотя бы углом, связаны. Обход идет
+        по отрезкам (их на порядки меньше, чем клеток), а открывается область
+        вместе с каймой в одну клетку одной маской NumPy.
+        """
+        width, height = self.width, self.height
+        grid = np.frombuffer(self.cells, dtype=np.uint8).reshape(height, width)
+        blocked = MINE | REVEALED | FLAGGED | NEIGHBORS_MASK
+        rows = {}
+
+        def row_runs(y):
+            """Начала и концы (не включая) отрезков строки y"""
+            runs = rows.get(y)
+            if runs is None:
+                edges = np.flatnonzero(np.diff((grid[y] & blocked) == 0, prepend=False, append=False))
+                runs = rows[y] = (edges[0::2].tolist(), edges[1::2].tolist())
+            return runs
+
+        # Отрезок - (строка, начало, конец); клетка стека - отрезок из одной клетки
+        stack = [(i // width, i % width, i % width + 1) for i in seeds]
+        seen = set()
+        region = []
+        while stack:
+            y, x0, x1 = run = stack.pop()
+            region.append(run)
+            for ny in (y - 1, y, y + 1):
+                if not 0 <= ny < height:
+                    continue
+                starts, ends = row_runs(ny)
+                # Отрезки строки ny, задевающие клетки x0 - 1 .. x1
+                k = bisect_left(ends, x0)
+                while k < len(starts) and starts[k] <= x1:
+                    if (ny, k) not in seen:
+                        seen.add((ny, k))
+                        stack.append((ny, starts[k], ends[k]))
+                    k += 1
+
+        top = max(min(y for y, _, _ in region) - 1, 0)
+        bottom = min(max(y for y, _, _ in region) + 2, height)
+        left = max(min(x0 for _, x0, _ in region) - 1, 0)
+        right = min(max(x1 for _, _, x1 in region) + 1, width)
+        mask = np.zeros((bottom - top, right - left), dtype=bool)
+        for y, x0, x1 in region:
+            mask[max(y - 1 - top, 0):y + 2 - top, max(x0 - 1, 0) - left:min(x1 + 1, width) - left] = True
+        box = grid[top:bottom, left:right]
+        mask &= (box & (REVEALED | FLAGGED)) == 0
+        box[mask] |= REVEALED
+        ys, xs = np.nonzero(mask)
+        changed.extend(((ys + top) * width + xs + left).tolist())
+
+    def reveal_all_mines(self, result):
+        """Показать все мины при поражении"""
+        cells = self.cells
+        for i in self.mines:
+            if not cells[i] & REVEALED:
+                cells[i] |= REVEALED
+                result.changed.append(i)
+
+    def check_win(self):
+        """Проверить условия победы по счетчикам, без обхода поля"""
+        # До первого хода мины еще не расставлены
+        if self.first_move:
+            return False
+
+        # Все не-мины открыты или все мины помечены флагами без лишних флагов
+        return self.safe_remaining == 0 or (
+            self.flags_correct == self.mine_count == self.flags_placed
+        )
+
+    def _update_win(self, result):
+        """Зафиксировать победу, если ход ее принес"""
+        if self.game_over or not self.check_win():
+            return
+        self.game_won = True
+        self.game_over = True
+        result.won = True
@@ -0,0 +1,212 @@
+"""Бесконечное поле: мины генерируются кусками по мере исследования"""
+import random
+
+from engine import FLAGGED, MINE, NEIGHBORS_MASK, REVEALED, MoveResult
+
+CHUNK_BITS = 5
+CHUNK = 1 << CHUNK_BITS  # Сторона куска в клетках
+CHUNK_MASK = CHUNK - 1
+
+
+class InfiniteEngine:
+    """Партия на поле, разбитом на куски CHUNK x CHUNK
+
+    Мины куска генерируются из детерминированного зерна (seed, cx, cy) только
+    тогда, когда открытие, заливка или подсчет соседей впервые его касаются.
+    Куски хранятся в словаре по координатам куска, нетронутые не занимают
+    памяти. Клетки хранятся в тех же байтах, что и у MinesweeperEngine.
+
+    Координаты ограничены квадратом SPAN x SPAN лишь для того, чтобы поле
+    помещалось в окно просмотра интерфейса; для игры это практически
+    бесконечность. Победы нет - партия идет до первой открытой мины.
+    """
+
+    SPAN = 1 << 24  # Сторона доступного квадрата координат
+    MIN_DENSITY = 0.12  # Реже мины - пустые области начинают сливаться в бесконечную заливку
+
+    def __init__(self, density=0.18, seed=None):
+        self.density = density
+        self.width = self.height = self.SPAN
+        self.reset(seed=seed)
+
+    def reset(self, density=None, seed=None):
+        """Начать новую партию"""
+        if density is not None:
+            self.density = density
+        if self.density < self.MIN_DENSITY:
+            raise ValueError(f"Плотность мин должна быть не меньше {self.MIN_DENSITY}")
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.mines_per_chunk = round(self.density * CHUNK * CHUNK)
+
+        self.game_over = False
+        self.game_won = False
+        self.first_move = True
+        self.flags_placed = 0
+        self.revealed_count = 0
+
+        self.chunks = {}  # (cx, cy) -> bytearray(CHUNK * CHUNK)
+        self.safe_x = self.safe_y = None  # Первый ход: вокруг него мин нет
+
+    def start_cell(self):
+        """Клетка в центре поля, с которой удобно начинать"""
+        return self.SPAN // 2, self.SPAN // 2
+
+    def index(self, x, y):
+        """Индекс клетки (для очереди перерисовки интерфейса)"""
+        return y * self.width + x
+
+    def _chunk(self, cx, cy):
+        """Кусок поля, при первом обращении - с новыми минами"""
+        chunk = self.chunks.get((cx, cy))
+        if chunk is None:
+            chunk = self._generate_chunk(cx, cy)
+            self.chunks[(cx, cy)] = chunk
+        return chunk
+
+    def _generate_chunk(self, cx, cy):
+        """Расставить мины куска по его собственному зерну"""
+        chunk = bytearray(CHUNK * CHUNK)
+        rng = random.Random(f"{self.seed}:{cx}:{cy}")
+        left, top = cx << CHUNK_BITS, cy << CHUNK_BITS
+        for offset in rng.sample(range(CHUNK * CHUNK), self.mines_per_chunk):
+            x = left + (offset & CHUNK_MASK)
+            y = top + (offset >> CHUNK_BITS)
+            # Квадрат 3x3 вокруг первого хода остается без мин
+            if abs(x - self.safe_x) <= 1 and abs(y - self.safe_y) <= 1:
+                continue
+            chunk[offset] = MINE
+        return chunk
+
+    def _peek(self, x, y):
+        """Байт клетки без создания куска (нетронутая клетка - 0)"""
+        chunk = self.chunks.get((x >> CHUNK_BITS, y >> CHUNK_BITS))
+        if chunk is None:
+            return 0
+        return chunk[((y & CHUNK_MASK) << CHUNK_BITS) | (x & CHUNK_MASK)]
+
+    def is_mine(self, x, y):
+        """Есть ли в клетке мина (известно для исследованных кусков)"""
+        return bool(self._peek(x, y) & MINE)
+
+    def is_revealed(self, x, y):
+        """Открыта ли клетка"""
+        return bool(self._peek(x, y) & REVEALED)
+
+    def is_flagged(self, x, y):
+        """Стоит ли на клетке флаг"""
+        return bool(self._peek(x, y) & FLAGGED)
+
+    def neighbors(self, x, y):
+        """Количество мин в соседних клетках (для открытых клеток)"""
+        return self._peek(x, y) & NEIGHBORS_MASK
+
+    def iter_neighbors(self, x, y):
+        """Перебрать координаты соседних клеток в пределах поля"""
+        for dy in range(-1, 2):
+            for dx in range(-1, 2):
+                if dx == 0 and dy == 0:
+                    continue
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < self.width and 0 <= ny < self.height:
+                    yield nx, ny
+
+    def _count_mines(self, x, y):
+        """Посчитать мины вокруг клетки, создавая соседние куски"""
+        count = 0
+        for nx, ny in self.iter_neighbors(x, y):
+            chunk = self._chunk(nx >> CHUNK_BITS, ny >> CHUNK_BITS)
+            count += chunk[((ny & CHUNK_MASK) << CHUNK_BITS) | (nx & CHUNK_MASK)] & MINE
+        return count >> 4
+
+    def reveal(self, x, y):
+        """Открыть клетку (левый клик)"""
+        result = MoveResult()
+        self._reveal(x, y, result)
+        return result
+
+    def toggle_flag(self, x, y):
+        """Поставить или снять флаг (правый клик; до первого хода поле пусто)"""
+        result = MoveResult()
+        if self.game_over or self.first_move:
+            return result
+        chunk = self._chunk(x >> CHUNK_BITS, y >> CHUNK_BITS)
+        offset = ((y & CHUNK_MASK) << CHUNK_BITS) | (x & CHUNK_MASK)
+        if chunk[offset] & REVEALED:
+            return result
+
+        chunk[offset] ^= FLAGGED
+        self.flags_placed += 1 if chunk[offset] & FLAGGED else -1
+        result.changed.append(self.index(x, y))
+        return result
+
+    def chord(self, x, y):
+        """Открыть соседей числа, если вокруг достаточно флагов (средний клик)"""
+        result = MoveResult()
+        cell = self._peek(x, y)
+        if self.game_over or not cell & REVEALED or not cell & NEIGHBORS_MASK:
+            return result
+
+        neighbors = list(self.iter_neighbors(x, y))
+        flag_count = sum(1 for nx, ny in neighbors if self._peek(nx, ny) & FLAGGED)
+        if flag_count == cell & NEIGHBORS_MASK:
+            for nx, ny in neighbors:
+                self._reveal(nx, ny, result)
+        return result
+
+    def check_win(self):
+        """На бесконечном поле победы нет"""
+        return False
+
+    def _reveal(self, x, y, result):
+        """Открыть клетку и, если она пустая, залить область вокруг"""
+        if self.game_over:
+            return
+        if self.first_move:
+            self.safe_x, self.safe_y = x, y
+            self.first_move = False
+            result.started = True
+
+        chunk = self._chunk(x >> CHUNK_BITS, y >> CHUNK_BITS)
+        offset = ((y & CHUNK_MASK) << CHUNK_BITS) | (x & CHUNK_MASK)
+        if chunk[offset] & (REVEALED | FLAGGED):
+            return
+
+        if chunk[offset] & MINE:
+            chunk[offset] |= REVEALED
+            self.revealed_count += 1
+            result.changed.append(self.index(x, y))
+            self.game_over = True
+            result.exploded = True
+            self.reveal_all_mines(result)
+            return
+
+        # Итеративная заливка; куски создаются по мере пересечения границ
+        stack = [(x, y)]
+        self._open(chunk, offset, x, y, result)
+        if chunk[offset] & NEIGHBORS_MASK:
+            return
+        while stack:
+            x, y = stack.pop()
+            for nx, ny in self.iter_neighbors(x, y):
+                chunk = self._chunk(nx >> CHUNK_BITS, ny >> CHUNK_BITS)
+                offset = ((ny & CHUNK_MASK) << CHUNK_BITS) | (nx & CHUNK_MASK)
+                if not chunk[offset] & (REVEALED | FLAGGED):
+                    self._open(chunk, offset, nx, ny, result)
+                    if not chunk[offset] & NEIGHBORS_MASK:
+                        stack.append((nx, ny))
+
+    def _open(self, chunk, offset, x, y, result):
+        """Открыть безопасную клетку, записав число соседей-мин"""
+        chunk[offset] |= REVEALED | self._count_mines(x, y)
+        self.revealed_count += 1
+        result.changed.append(self.index(x, y))
+
+    def reveal_all_mines(self, result):
+        """Показать мины исследованных кусков при поражении"""
+        for (cx, cy), chunk in self.chunks.items():
+            for offset, cell in enumerate(chunk):
+                if cell & MINE and not cell & REVEALED:
+                    chunk[offset] = cell | REVEALED
+                    x = (cx << CHUNK_BITS) + (offset & CHUNK_MASK)
+                    y = (cy << CHUNK_BITS) + (offset >> CHUNK_BITS)
+                    result.changed.append(self.index(x, y))
@@ -0,0 +1,106 @@
+"""Журнал ходов текущей партии на случай сбоя
+
+Журнал - файл в формате повтора (replay.py): заголовок пишется перед первым
+ходом, затем ходы дописываются в конец пачками из фонового потока записи.
+После аварийного завершения партия восстанавливается проигрыванием
+журнала на поле с тем же зерном - за время, пропорциональное числу ходов.
+"""
+import os
+import threading
+
+from engine import MinesweeperEngine
+from replay import MAGIC, Replay, ReplayRecorder, replay_moves, write_varint
+
+
+class MoveJournal:
+    """Журнал ходов, дописываемый потоком BackgroundWriter
+
+    Главный поток только копит байты в буфере; поток записи забирает весь
+    накопленный буфер разом, дописывает его в файл и сбрасывает на диск.
+    Файл открывается, пишется и закрывается только в потоке записи.
+    """
+
+    def __init__(self, path, writer):
+        self.path = path
+        self.writer = writer
+        self.lock = threading.Lock()
+        self.buffer = bytearray()  # Байты, еще не переданные потоку записи
+        self.restart = False  # Начать файл заново (новая партия)
+        self.remove = False  # Удалить файл (партия закончена)
+        self.file = None
+
+    def start(self, width, height, mine_count, seed, moves=b""):
+        """Начать журнал партии: заголовок и уже сделанные ходы"""
+        header = bytearray(MAGIC)
+        for value in (width, height, mine_count, seed):
+            write_varint(header, value)
+        header += moves
+        with self.lock:
+            self.buffer = header
+            self.restart = True
+        self._submit()
+
+    def append(self, moves):
+        """Дописать закодированные ходы (байты из ReplayRecorder.moves)"""
+        with self.lock:
+            self.buffer += moves
+        self._submit()
+
+    def discard(self):
+        """Удалить журнал: партия закончена или сохранена другим способом"""
+        with self.lock:
+            self.buffer = bytearray()
+            self.restart = False
+            self.remove = True
+        self._submit()
+
+    def close(self):
+        """Закрыть файл журнала (в потоке записи), не удаляя его"""
+        self.writer.submit((self.path, "close"), self._close_file)
+
+    def _submit(self):
+        self.writer.submit(self.path, self._flush)
+
+    def _flush(self):
+        """Записать накопленное (выполняется в потоке записи)"""
+        with self.lock:
+            data, self.buffer = self.buffer, bytearray()
+            restart, remove = self.restart, self.remove
+            self.restart = self.remove = False
+
+        if remove or restart:
+            self._close_file()
+        if remove:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        if restart:
+            self.file = open(self.path, 'wb')
+        if data and self.file is not None:
+            self.file.write(data)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def _close_file(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def recover(path):
+    """Восстановить партию из журнала: (движок, запись ходов)
+
+    Неполный последний ход (оборванная при сбое запись) отбрасывается.
+    Нечитаемый журнал дает OSError или ValueError.
+    """
+    with open(path, 'rb') as f:
+        replay = Replay(f)
+        engine = MinesweeperEngine(replay.width, replay.height, replay.mine_count, seed=replay.seed)
+        recorder = ReplayRecorder()
+        try:
+            for action, index, time_ms, _ in replay_moves(engine, replay.moves()):
+                recorder.record(action, index, time_ms)
+        except ValueError:
+            pass
+    return engine, recorder
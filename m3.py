@@ -1,14 +1,55 @@
-import tkinter as tk
-from tkinter import messagebox, simpledialog
-import random
-import time
-import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+import analyze
+import bench
+import journal
+import simulate
+import snapshot
+import verify
+from clock import GameClock, format_seconds, record_time_ms
+from engine import MinesweeperEngine
+from infinite import InfiniteEngine
+from no_guess import NoGuessSearch
+from records import (DIFFICULTIES, LEGACY_CUSTOM, PRESETS, BackgroundWriter, board_key,
+                     open_record_store, write_atomic)
+from replay import CHORD, FLAG, REVEAL, ReplayRecorder, replay_path
+from solver import ConstraintSolver, ProbabilityEngine
+
+# Tkinter и отрисовщики поля загружаются только для окна игры (_load_tk),
+# чтобы консольные команды работали без графической среды
+tk = messagebox = simpledialog = None
+BOARD_VIEWS = None
+
+# Консольные команды: python m3.py <команда> [параметры]
+COMMANDS = {
+    "simulate": simulate.main,
+    "bench": bench.main,
+    "analyze": analyze.main,
+    "verify": verify.main,
+}
+
+
+def _load_tk():
+    """Импортировать Tkinter и отрисовщики поля"""
+    global tk, messagebox, simpledialog, BOARD_VIEWS
+    import tkinter
+    import tkinter.messagebox
+    import tkinter.simpledialog
+    import tkinter.ttk  # Необходимо для работы notebook (вкладок) в таблице рекордов
+    from board_view import BOARD_VIEWS as views
+
+    tk = tkinter
+    messagebox = tkinter.messagebox
+    simpledialog = tkinter.simpledialog
+    BOARD_VIEWS = views
+
 
 class Minesweeper:
     def __init__(self):
+        _load_tk()
         self.root = tk.Tk()
         self.root.title("Морской Сапер")
 
@@ -49,22 +90,47 @@ class Minesweeper:
         self.width = 9
         self.height = 9
         self.mine_count = 10
-        self.MAX_WIDTH = 16  # Максимальная ширина поля
+        self.current_difficulty = "easy"
+        self.infinite_density = 0.18  # Доля мин на бесконечном поле
+        self.MAX_WIDTH = 16  # Максимальная ширина поля из кнопок
+        self.MAX_HEIGHT = 30  # Максимальная высота поля из кнопок
+        # Предел стороны поля на холсте с прокруткой: открытие почти всего поля
+        # 3000x3000 одним кликом занимает около полутора секунд и ~800 МБ
+        self.MAX_BOARD_SIDE = 3000
 
         # Игровые переменные
-        self.board = []
-        self.buttons = []
-        self.mines = []
-        self.game_over = False
-        self.game_won = False
-        self.first_move = True
-        self.start_time = None
-        self.flags_placed = 0
-        self.revealed_count = 0
-
-        # Таблица рекордов
-        self.records_file = "minesweeper_records.json"
-        self.records = self.load_records()
+        self.engine = MinesweeperEngine(self.width, self.height, self.mine_count)
+        self.board_view = None
+        self.renderer = "canvas"  # Вид поля: "canvas" (холст) или "buttons" (кнопки)
+
+        # Поля без угадывания: поиск зерна в пуле процессов после первого клика
+        self.no_guess = False
+        self.search_executor = None  # Пул создается при первом поиске
+        self.search = None  # Идущий поиск и клетка первого хода
+        self.search_cell = None
+        self.search_job = None
+
+        # Таблица рекордов: история партий в SQLite (прежний JSON переносится при первом запуске)
+        self.legacy_records_file = "minesweeper_records.json"  # Источник переноса (или хранилище без sqlite3)
+        self.records_db = "minesweeper_records.db"
+        self.records = open_record_store(self.records_db, self.legacy_records_file)
+
+        # Повторы партий: ходы копятся в памяти и пишутся в файл в конце партии
+        self.replay_dir = "replays"
+        self.replay = ReplayRecorder()
+        self.replay_writer = BackgroundWriter("replay-writer")
+        self.last_replay = None  # Путь и содержимое повтора последней законченной партии
+
+        # Незаконченная партия сохраняется при выходе (и по желанию каждые AUTOSAVE_MOVES ходов)
+        self.save_file = "minesweeper_save.bin"
+        self.AUTOSAVE_MOVES = 25
+        self.autosave = False
+        self.moves_since_save = 0
+
+        # Журнал ходов партии дописывается в фоне после каждого хода и удаляется
+        # в конце партии; оставшийся журнал означает аварийное завершение игры
+        self.journal_file = "minesweeper_journal.msr"
+        self.journal = journal.MoveJournal(self.journal_file, self.replay_writer)
 
         # Цвета для чисел (мягкие оттенки)
         self.number_colors = {
@@ -86,15 +152,26 @@ class Minesweeper:
         self.create_info_panel()
         self.create_game_frame()
 
-        self.new_game()
+        # Единственные часы партии; на время потери фокуса окном встают на паузу
+        self.clock = GameClock(self.root, self.update_timer)
+        self.root.bind('<FocusOut>', lambda e: self.on_focus_change(e, False))
+        self.root.bind('<FocusIn>', lambda e: self.on_focus_change(e, True))
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_game)
+
+        if not self.resume_game():
+            self.new_game()
 
     def calculate_cell_size(self):
         """Рассчитать размер клетки в зависимости от ширины поля"""
         base_size = 40
-        if self.width > 12:
-            return 35
+        if self.width > 50:
+            return 16
+        elif self.width > 30:
+            return 22
         elif self.width > 15:
             return 30
+        elif self.width > 12:
+            return 35
         return base_size
 
     def get_player_name(self):
@@ -213,55 +290,32 @@ class Minesweeper:
             messagebox.showinfo("Успех", f"Имя изменено на: {self.player_name}")
             self.player_label.config(text=f" {self.player_name}")
 
-    def load_records(self):
-        """Загрузка таблицы рекордов из файла"""
-        if os.path.exists(self.records_file):
-            try:
-                with open(self.records_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-
-        # Создаем пустую таблицу рекордов
-        return {
-            "easy": [],
-            "medium": [],
-            "hard": [],
-            "custom": []
-        }
-
-    def save_records(self):
-        """Сохранение таблицы рекордов в файл"""
-        try:
-            with open(self.records_file, 'w', encoding='utf-8') as f:
-                json.dump(self.records, f, indent=2, ensure_ascii=False)
-        except:
-            pass
-
-    def add_record(self, difficulty, time_seconds):
-        """Добавление нового рекорда с именем текущего игрока"""
-        record = {
+    def record_game(self, won, time_ms, verified=False):
+        """Сохранить законченную партию в историю вместе со ссылкой на повтор"""
+        if self.current_difficulty not in DIFFICULTIES:
+            return
+        self.records.add_game({
             "name": self.player_name,
-            "time": time_seconds,
+            "difficulty": self.current_difficulty,
+            "width": self.width,
+            "height": self.height,
+            "mines": self.mine_count,
+            "time_ms": time_ms,
             "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "difficulty": difficulty
-        }
-
-        # Добавляем запись и сортируем по времени
-        self.records[difficulty].append(record)
-        self.records[difficulty] = sorted(
-            self.records[difficulty],
-            key=lambda x: x["time"]
-        )[:10]  # Оставляем только 10 лучших
-
-        self.save_records()
+            "seed": self.engine.seed,
+            "won": won,
+            "replay": self.last_replay[0] if self.last_replay else None,
+            "verified": verified,
+        })
 
-        # Показываем сообщение о новом рекорде
+    def add_record(self, difficulty, time_ms):
+        """Сообщить о новом рекорде текущего игрока"""
         messagebox.showinfo(
             "Новый рекорд! 🏆",
             f"🎉 {self.player_name}, вы установили новый рекорд!\n\n"
-            f"Уровень: {self.get_difficulty_name(difficulty)}\n"
-            f"Время: {time_seconds} секунд\n\n"
+            f"Уровень: {self.get_difficulty_name(difficulty)}"
+            f" ({self.width}x{self.height}, {self.mine_count} мин)\n"
+            f"Время: {format_seconds(time_ms)} секунд\n\n"
             f"Рекорд сохранен в таблице!"
         )
 
@@ -273,7 +327,8 @@ class Minesweeper:
             "easy": "🌊 Новичок",
             "medium": "⚓ Любитель",
             "hard": "🚢 Профессионал",
-            "custom": "🧭 Пользовательский"
+            "custom": "🧭 Пользовательский",
+            "infinite": "♾️ Бесконечное поле"
         }
         return names.get(difficulty, difficulty)
 
@@ -367,7 +422,7 @@ class Minesweeper:
 
             # Заголовки колонок
             headers = ["Место", "Имя", "Время", "Дата"]
-            widths = [8, 15, 8, 12]
+            widths = [8, 15, 11, 12]
 
             for i, (header, width) in enumerate(zip(headers, widths)):
                 tk.Label(
@@ -404,101 +459,10 @@ class Minesweeper:
             canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
             canvas.configure(yscrollcommand=scrollbar.set)
 
-            records = self.records.get(diff_key, [])
-            if not records:
-                empty_frame = tk.Frame(
-                    scrollable_frame,
-                    bg=self.colors['records_bg'],
-                    height=200
-                )
-                empty_frame.pack(fill=tk.BOTH, expand=True)
-
-                tk.Label(
-                    empty_frame,
-                    text="📭 Пока нет рекордов!",
-                    font=("Arial", 14),
-                    bg=self.colors['records_bg'],
-                    fg=self.colors['text_secondary']
-                ).pack(pady=20)
-
-                tk.Label(
-                    empty_frame,
-                    text="Сыграйте и станьте первым! 🎮",
-                    font=("Arial", 11),
-                    bg=self.colors['records_bg'],
-                    fg=self.colors['accent']
-                ).pack()
+            if diff_key == "custom":
+                self.create_custom_records_selector(frame, header_frame, scrollable_frame)
             else:
-                for i, record in enumerate(records[:10], 1):
-                    # Чередуем цвета строк для лучшей читаемости
-                    if i % 2 == 0:
-                        row_color = self.colors['records_row1']
-                    else:
-                        row_color = self.colors['records_row2']
-
-                    # Подсвечиваем записи текущего игрока
-                    if record["name"] == self.player_name:
-                        row_color = self.colors['accent']
-
-                    row_frame = tk.Frame(
-                        scrollable_frame,
-                        bg=row_color,
-                        relief=tk.FLAT,
-                        bd=1
-                    )
-                    row_frame.pack(fill=tk.X, pady=1)
-
-                    # Место с иконкой для первых трех мест
-                    if i == 1:
-                        place_text = "🥇"
-                        place_color = "#FFD700"  # Золотой
-                    elif i == 2:
-                        place_text = "🥈"
-                        place_color = "#C0C0C0"  # Серебряный
-                    elif i == 3:
-                        place_text = "🥉"
-                        place_color = "#CD7F32"  # Бронзовый
-                    else:
-                        place_text = f"{i}"
-                        place_color = self.colors['text']
-
-                    tk.Label(
-                        row_frame,
-                        text=place_text,
-                        font=("Arial", 11, "bold"),
-                        bg=row_color,
-                        fg=place_color,
-                        width=6
-                    ).grid(row=0, column=0, padx=5)
-
-                    # Имя (выделяем жирным, если это текущий игрок)
-                    name_font = ("Arial", 11, "bold" if record["name"] == self.player_name else "normal")
-                    tk.Label(
-                        row_frame,
-                        text=record["name"][:15],
-                        font=name_font,
-                        bg=row_color,
-                        fg=self.colors['text'],
-                        width=15
-                    ).grid(row=0, column=1, padx=5)
-
-                    tk.Label(
-                        row_frame,
-                        text=f"{record['time']} сек",
-                        font=("Arial", 11, "bold"),
-                        bg=row_color,
-                        fg=self.colors['success'],
-                        width=8
-                    ).grid(row=0, column=2, padx=5)
-
-                    tk.Label(
-                        row_frame,
-                        text=record["date"][:10],
-                        font=("Arial", 9),
-                        bg=row_color,
-                        fg=self.colors['text_secondary'],
-                        width=12
-                    ).grid(row=0, column=3, padx=5)
+                self.fill_records_table(scrollable_frame, self.records.top(board_key(*PRESETS[diff_key])))
 
             canvas.pack(side="left", fill="both", expand=True, padx=(0, 5))
             scrollbar.pack(side="right", fill="y")
@@ -528,6 +492,133 @@ class Minesweeper:
 
         canvas.bind_all("<MouseWheel>", _on_mousewheel)
 
+    def fill_records_table(self, table, records):
+        """Заполнить таблицу рекордов строками (или заглушкой, если рекордов нет)"""
+        if not records:
+            empty_frame = tk.Frame(
+                table,
+                bg=self.colors['records_bg'],
+                height=200
+            )
+            empty_frame.pack(fill=tk.BOTH, expand=True)
+
+            tk.Label(
+                empty_frame,
+                text="📭 Пока нет рекордов!",
+                font=("Arial", 14),
+                bg=self.colors['records_bg'],
+                fg=self.colors['text_secondary']
+            ).pack(pady=20)
+
+            tk.Label(
+                empty_frame,
+                text="Сыграйте и станьте первым! 🎮",
+                font=("Arial", 11),
+                bg=self.colors['records_bg'],
+                fg=self.colors['accent']
+            ).pack()
+        else:
+            for i, record in enumerate(records[:10], 1):
+                # Чередуем цвета строк для лучшей читаемости
+                if i % 2 == 0:
+                    row_color = self.colors['records_row1']
+                else:
+                    row_color = self.colors['records_row2']
+
+                # Подсвечиваем записи текущего игрока
+                if record["name"] == self.player_name:
+                    row_color = self.colors['accent']
+
+                row_frame = tk.Frame(
+                    table,
+                    bg=row_color,
+                    relief=tk.FLAT,
+                    bd=1
+                )
+                row_frame.pack(fill=tk.X, pady=1)
+
+                # Место с иконкой для первых трех мест
+                if i == 1:
+                    place_text = "🥇"
+                    place_color = "#FFD700"  # Золотой
+                elif i == 2:
+                    place_text = "🥈"
+                    place_color = "#C0C0C0"  # Серебряный
+                elif i == 3:
+                    place_text = "🥉"
+                    place_color = "#CD7F32"  # Бронзовый
+                else:
+                    place_text = f"{i}"
+                    place_color = self.colors['text']
+
+                tk.Label(
+                    row_frame,
+                    text=place_text,
+                    font=("Arial", 11, "bold"),
+                    bg=row_color,
+                    fg=place_color,
+                    width=6
+                ).grid(row=0, column=0, padx=5)
+
+                # Имя (выделяем жирным, если это текущий игрок)
+                name_font = ("Arial", 11, "bold" if record["name"] == self.player_name else "normal")
+                tk.Label(
+                    row_frame,
+                    text=record["name"][:15],
+                    font=name_font,
+                    bg=row_color,
+                    fg=self.colors['text'],
+                    width=15
+                ).grid(row=0, column=1, padx=5)
+
+                tk.Label(
+                    row_frame,
+                    text=f"{format_seconds(record_time_ms(record))} сек",
+                    font=("Arial", 11, "bold"),
+                    bg=row_color,
+                    fg=self.colors['success'],
+                    width=11
+                ).grid(row=0, column=2, padx=5)
+
+                tk.Label(
+                    row_frame,
+                    text=record["date"][:10],
+                    font=("Arial", 9),
+                    bg=row_color,
+                    fg=self.colors['text_secondary'],
+                    width=12
+                ).grid(row=0, column=3, padx=5)
+
+    def create_custom_records_selector(self, frame, header_frame, table):
+        """Выбор конфигурации поля для вкладки пользовательских рекордов"""
+        configurations = sorted(
+            (key for key in self.records.configurations()
+             if key is not LEGACY_CUSTOM and key not in [board_key(*size) for size in PRESETS.values()]),
+            key=lambda key: (key[0] * key[1], key)
+        )
+        labels = {f"{width}x{height}, {mines} мин": (width, height, mines)
+                  for width, height, mines in configurations}
+        if LEGACY_CUSTOM in self.records.configurations():
+            labels["Прежние (размер не сохранен)"] = LEGACY_CUSTOM
+        if not labels:
+            self.fill_records_table(table, [])
+            return
+
+        # По умолчанию - текущее поле, если в нем уже есть рекорды
+        current = board_key(self.width, self.height, self.mine_count)
+        selected = next((label for label, key in labels.items() if key == current), next(iter(labels)))
+        selector = tk.ttk.Combobox(frame, values=list(labels), state="readonly")
+        selector.set(selected)
+        selector.pack(fill=tk.X, pady=(0, 5), before=header_frame)
+
+        def show_selected(event=None):
+            for widget in table.winfo_children():
+                widget.destroy()
+            self.fill_records_table(table, self.records.top(labels[selector.get()]))
+
+        selector.bind("<<ComboboxSelected>>", show_selected)
+        show_selected()
+
     def clear_records(self):
         """Очистить таблицу рекордов"""
         if messagebox.askyesno(
@@ -536,13 +627,7 @@ class Minesweeper:
                 "Это действие нельзя отменить!",
                 parent=self.root
         ):
-            self.records = {
-                "easy": [],
-                "medium": [],
-                "hard": [],
-                "custom": []
-            }
-            self.save_records()
+            self.records.clear()
             messagebox.showinfo("Успех ✅", "Таблица рекордов очищена!")
 
     def create_menu(self):
@@ -562,6 +647,7 @@ class Minesweeper:
                             activeforeground="white")
         menubar.add_cascade(label="🌊 Игра", menu=game_menu)
         game_menu.add_command(label="🔄 Новая игра", command=self.new_game, accelerator="Ctrl+N")
+        game_menu.add_command(label="💡 Подсказка", command=self.show_hint, accelerator="H")
         game_menu.add_separator()
 
         # Меню "Сложность"
@@ -579,13 +665,37 @@ class Minesweeper:
                                     command=lambda: self.set_difficulty(16, 30, 99, "hard"))
         difficulty_menu.add_command(label="🧭 Пользовательский",
                                     command=self.custom_difficulty)
+        difficulty_menu.add_command(label="♾️ Бесконечное поле",
+                                    command=self.set_infinite)
+
+        # Меню "Вид поля"
+        view_menu = tk.Menu(game_menu, tearoff=0,
+                            bg=self.colors['panel'],
+                            fg=self.colors['text'],
+                            activebackground=self.colors['accent'],
+                            activeforeground="white")
+        game_menu.add_cascade(label="🖼️ Вид поля", menu=view_menu)
+        self.renderer_var = tk.StringVar(value=self.renderer)
+        view_menu.add_radiobutton(label="🎨 Холст (быстрый)", value="canvas",
+                                  variable=self.renderer_var,
+                                  command=lambda: self.set_renderer(self.renderer_var.get()))
+        view_menu.add_radiobutton(label="🔲 Кнопки", value="buttons",
+                                  variable=self.renderer_var,
+                                  command=lambda: self.set_renderer(self.renderer_var.get()))
+        self.no_guess_var = tk.BooleanVar(value=self.no_guess)
+        game_menu.add_checkbutton(label="🧠 Без угадываний", variable=self.no_guess_var,
+                                  command=lambda: self.set_no_guess(self.no_guess_var.get()))
+        self.autosave_var = tk.BooleanVar(value=self.autosave)
+        game_menu.add_checkbutton(label=f"💾 Автосохранение каждые {self.AUTOSAVE_MOVES} ходов",
+                                  variable=self.autosave_var,
+                                  command=lambda: setattr(self, 'autosave', self.autosave_var.get()))
         game_menu.add_separator()
         game_menu.add_command(label="👤 Сменить имя игрока", command=self.change_player_name)
         game_menu.add_separator()
         game_menu.add_command(label="🏆 Таблица рекордов", command=self.show_records, accelerator="F2")
         game_menu.add_command(label="🗑️ Очистить рекорды", command=self.clear_records)
         game_menu.add_separator()
-        game_menu.add_command(label="🚪 Выход", command=self.root.quit, accelerator="Ctrl+Q")
+        game_menu.add_command(label="🚪 Выход", command=self.exit_game, accelerator="Ctrl+Q")
 
         # Меню "Справка"
         help_menu = tk.Menu(menubar, tearoff=0,
@@ -599,8 +709,9 @@ class Minesweeper:
 
         # Привязка горячих клавиш
         self.root.bind('<Control-n>', lambda e: self.new_game())
-        self.root.bind('<Control-q>', lambda e: self.root.quit())
+        self.root.bind('<Control-q>', lambda e: self.exit_game())
         self.root.bind('<F2>', lambda e: self.show_records())
+        self.root.bind('<h>', lambda e: self.show_hint())
 
     def create_game_frame(self):
         """Создание игрового поля"""
@@ -608,7 +719,7 @@ class Minesweeper:
                                    bg=self.colors['primary'],
                                    padx=10,
                                    pady=10)
-        self.game_frame.pack()
+        self.game_frame.pack(fill=tk.BOTH, expand=True)
 
     def create_info_panel(self):
         """Создание панели информации"""
@@ -756,84 +867,69 @@ class Minesweeper:
     def new_game(self):
         """Начать новую игру"""
         # Сброс состояния
-        self.game_over = False
-        self.game_won = False
-        self.first_move = True
-        self.flags_placed = 0
-        self.revealed_count = 0
-        self.start_time = None
-        self.current_difficulty = "easy"  # По умолчанию
+        self.cancel_search()
+        if self.current_difficulty == "infinite":
+            if not isinstance(self.engine, InfiniteEngine):
+                self.engine = InfiniteEngine(self.infinite_density)
+            self.engine.reset()
+            self.width, self.height = self.engine.width, self.engine.height
+        else:
+            if not isinstance(self.engine, MinesweeperEngine):
+                self.engine = MinesweeperEngine()
+            self.engine.reset(self.width, self.height, self.mine_count)
+        self.clock.reset()
+        self.update_timer(0)
+        self.replay.reset()
+        self.discard_save()
+        self.journal.discard()
 
         # Пересчитываем размер клетки
         self.cell_size = self.calculate_cell_size()
 
-        # Очистка поля
-        for widget in self.game_frame.winfo_children():
-            widget.destroy()
-
-        # Создание кнопок
-        self.buttons = []
-        for y in range(self.height):
-            row = []
-            for x in range(self.width):
-                btn = tk.Button(
-                    self.game_frame,
-                    width=2 if self.width > 12 else 3,
-                    height=1,
-                    font=("Arial", 10 if self.width > 12 else 11),
-                    relief=tk.RAISED,
-                    bd=2,
-                    bg=self.colors['cell_hidden'],
-                    fg=self.colors['text'],
-                    activebackground=self.colors['accent'],
-                    cursor="hand2"
-                )
-                btn.grid(row=y, column=x, padx=1, pady=1)
-
-                # Привязка событий
-                btn.bind("<Button-1>", lambda e, x=x, y=y: self.left_click(x, y))
-                btn.bind("<Button-3>", lambda e, x=x, y=y: self.right_click(x, y))
-                btn.bind("<Button-2>", lambda e, x=x, y=y: self.middle_click(x, y))
-
-                # Эффект наведения
-                btn.bind("<Enter>", lambda e, b=btn: b.config(
-                    bg=self.colors['accent'],
-                    relief=tk.RAISED
-                ))
-                btn.bind("<Leave>", lambda e, b=btn, x=x, y=y:
-                b.config(
-                    bg=self.colors['cell_hidden'] if not self.board or not self.board[y][x]['revealed'] else
-                    self.colors['cell_revealed'],
-                    relief=tk.RAISED
-                ))
-
-                row.append(btn)
-            self.buttons.append(row)
-
-        # Инициализация игрового поля
-        self.board = []
-        for y in range(self.height):
-            row = []
-            for x in range(self.width):
-                row.append({
-                    'is_mine': False,
-                    'neighbors': 0,
-                    'revealed': False,
-                    'flagged': False
-                })
-            self.board.append(row)
-
-        self.mines = []
+        # Построение поля
+        self.create_board_view()
+        if self.current_difficulty == "infinite":
+            self.board_view.center_on(*self.engine.start_cell())
 
         # Обновление информации
         self.update_info()
 
-        # Запуск таймера
-        self.update_timer()
-
         # Центрирование окна после создания поля
         self.center_window()
 
+    def create_board_view(self):
+        """Создать поле выбранным отрисовщиком"""
+        view_class = BOARD_VIEWS[self.renderer]
+        if not isinstance(self.board_view, view_class):
+            if self.board_view is not None:
+                self.board_view.destroy()
+            self.board_view = view_class(self, self.game_frame)
+        self.board_view.build(self.width, self.height)
+
+    def max_board_size(self, renderer=None):
+        """Наибольшие ширина и высота поля для вида поля"""
+        if (renderer or self.renderer) == "buttons":
+            return self.MAX_WIDTH, self.MAX_HEIGHT
+        return self.MAX_BOARD_SIDE, self.MAX_BOARD_SIDE
+
+    def set_renderer(self, renderer):
+        """Переключить вид поля, не прерывая текущую партию"""
+        max_width, max_height = self.max_board_size(renderer)
+        if self.width > max_width or self.height > max_height:
+            messagebox.showwarning(
+                "Вид поля",
+                f"Поле {self.width}×{self.height} слишком велико для кнопок\n"
+                f"(не больше {max_width}×{max_height}).",
+                parent=self.root
+            )
+            self.renderer_var.set(self.renderer)
+            return
+
+        self.renderer = renderer
+        self.create_board_view()
+        self.board_view.redraw()
+        self.center_window()
+
     def center_window(self):
         """Центрировать окно после изменения размера поля"""
         self.root.update_idletasks()
@@ -845,21 +941,35 @@ class Minesweeper:
 
     def set_difficulty(self, width, height, mines, difficulty):
         """Установить уровень сложности"""
-        self.width = min(width, self.MAX_WIDTH)  # Ограничиваем ширину
+        self.width = min(width, self.max_board_size()[0])  # Ограничиваем ширину
         self.height = height
         self.mine_count = mines
         self.current_difficulty = difficulty
         self.new_game()
 
+    def set_infinite(self):
+        """Перейти на бесконечное поле (только вид «Холст»)"""
+        if self.renderer == "buttons":
+            messagebox.showwarning(
+                "Бесконечное поле",
+                "Бесконечное поле доступно только в виде «Холст».\n"
+                "Переключите вид поля в меню Игра → Вид поля.",
+                parent=self.root
+            )
+            return
+        self.current_difficulty = "infinite"
+        self.new_game()
+
     def custom_difficulty(self):
         """Настройка пользовательской сложности"""
+        max_width, max_height = self.max_board_size()
         try:
             width = simpledialog.askinteger(
                 "Пользовательские настройки ⚙️",
-                f"Введите ширину поля (5-{self.MAX_WIDTH}):",
+                f"Введите ширину поля (5-{max_width}):",
                 minvalue=5,
-                maxvalue=self.MAX_WIDTH,
-                initialvalue=min(self.width, self.MAX_WIDTH),
+                maxvalue=max_width,
+                initialvalue=min(self.width, max_width),
                 parent=self.root
             )
             if not width:
@@ -867,10 +977,10 @@ class Minesweeper:
 
             height = simpledialog.askinteger(
                 "Пользовательские настройки ⚙️",
-                "Введите высоту поля (5-30):",
+                f"Введите высоту поля (5-{max_height}):",
                 minvalue=5,
-                maxvalue=30,
-                initialvalue=self.height,
+                maxvalue=max_height,
+                initialvalue=min(self.height, max_height),
                 parent=self.root
             )
             if not height:
@@ -896,83 +1006,87 @@ class Minesweeper:
         except:
             pass
 
-    def generate_mines(self, safe_x, safe_y):
-        """Сгенерировать мины, избегая безопасных клеток"""
-        safe_cells = set()
-
-        # Добавляем первую клетку и соседей в безопасные
-        for dy in range(-1, 2):
-            for dx in range(-1, 2):
-                nx, ny = safe_x + dx, safe_y + dy
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    safe_cells.add((nx, ny))
-
-        # Генерация мин
-        self.mines = []
-        while len(self.mines) < self.mine_count:
-            x = random.randint(0, self.width - 1)
-            y = random.randint(0, self.height - 1)
-            if (x, y) not in safe_cells and (x, y) not in self.mines:
-                self.mines.append((x, y))
-                self.board[y][x]['is_mine'] = True
-
-        # Подсчет соседей-мин для каждой клетки
-        for y in range(self.height):
-            for x in range(self.width):
-                if not self.board[y][x]['is_mine']:
-                    count = 0
-                    for dy in range(-1, 2):
-                        for dx in range(-1, 2):
-                            if dx == 0 and dy == 0:
-                                continue
-                            nx, ny = x + dx, y + dy
-                            if 0 <= nx < self.width and 0 <= ny < self.height:
-                                if self.board[ny][nx]['is_mine']:
-                                    count += 1
-                    self.board[y][x]['neighbors'] = count
-
     def left_click(self, x, y):
         """Обработка левого клика (открытие клетки)"""
-        if self.game_over or self.board[y][x]['revealed'] or self.board[y][x]['flagged']:
+        if self.search is not None:
             return
-
-        # Первый ход - генерация мин
-        if self.first_move:
-            self.generate_mines(x, y)
-            self.first_move = False
-            self.start_time = time.time()
-
-        # Открываем клетку
-        self.board[y][x]['revealed'] = True
-        self.revealed_count += 1
-        self.update_button(x, y)
-
-        # Если мина - поражение
-        if self.board[y][x]['is_mine']:
-            self.game_over = True
-            self.reveal_all_mines()
-            self.show_game_over_message(False)
+        if self.no_guess and self.engine.first_move and isinstance(self.engine, MinesweeperEngine):
+            self.start_search(x, y)
             return
+        self.play(REVEAL, x, y)
 
-        # Если пустая клетка - открываем соседей
-        if self.board[y][x]['neighbors'] == 0:
-            self.reveal_neighbors(x, y)
+    def set_no_guess(self, enabled):
+        """Включить или выключить поля без угадывания (со следующей партии)"""
+        self.no_guess = enabled
+        self.new_game()
 
-        # Проверка победы
-        self.check_win()
+    def start_search(self, x, y):
+        """Начать поиск поля без угадывания для первого хода в (x, y)"""
+        if self.search_executor is None:
+            self.search_executor = ProcessPoolExecutor()
+        workers = os.cpu_count() or 1
+        self.search = NoGuessSearch(self.search_executor, workers, self.width, self.height,
+                                    self.mine_count, x, y)
+        self.search_cell = (x, y)
+        self.root.config(cursor="watch")
+        self.mines_label.config(text=" ⏳", fg=self.colors['text'])
+        self.search_job = self.root.after(50, self.poll_search)
+
+    def poll_search(self):
+        """Опросить поиск, не блокируя интерфейс"""
+        self.search_job = None
+        if not self.search.poll():
+            self.search_job = self.root.after(50, self.poll_search)
+            return
 
-    def show_game_over_message(self, is_win):
-        """Показать сообщение о конце игры"""
+        seed = self.search.seed
+        x, y = self.search_cell
+        self.cancel_search()
+        if seed is None:
+            messagebox.showinfo(
+                "🧠 Без угадываний",
+                "Не удалось найти поле без угадываний с такой плотностью мин.\n"
+                "Игра продолжится на обычном поле."
+            )
+        else:
+            # Мины расставляются по зерну при первом открытии, флаги остаются на местах
+            self.engine.seed = seed
+            # Флаги до первого открытия уже начали журнал со старым зерном
+            if self.replay.move_count:
+                self.journal.start(self.width, self.height, self.mine_count, seed,
+                                   bytes(self.replay.moves))
+        self.play(REVEAL, x, y)
+
+    def cancel_search(self):
+        """Прервать поиск поля, если он идет"""
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+            self.search_job = None
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
+            self.root.config(cursor="")
+            self.update_info()
+
+    def show_game_over_message(self, is_win, elapsed_ms=None):
+        """Показать сообщение о конце игры (elapsed_ms - официальное время победы)"""
         if is_win:
-            elapsed_time = int(time.time() - self.start_time) if self.start_time else 0
             messagebox.showinfo(
                 "Победа! 🎉",
                 f"🏆 {self.player_name}, ПОЗДРАВЛЯЕМ! ВЫ ВЫИГРАЛИ! 🏆\n\n"
-                f"Время: {elapsed_time} секунд\n"
+                f"Время: {format_seconds(elapsed_ms)} секунд\n"
                 f"Уровень: {self.get_difficulty_name(self.current_difficulty)}\n"
                 f"Размер поля: {self.width}×{self.height}\n\n"
                 f"Нажмите OK чтобы продолжить"
             )
+        elif self.current_difficulty == "infinite":
+            messagebox.showinfo(
+                "Поражение 💥",
+                f"💣 {self.player_name}, ВЫ НАТУПИЛИ НА МИНУ! 💣\n\n"
+                f"Открыто клеток: {self.engine.revealed_count - 1}\n"
+                f"Исследовано кусков поля: {len(self.engine.chunks)}\n"
+                f"Попробуйте еще раз!"
+            )
         else:
             messagebox.showinfo(
                 "Поражение 💥",
@@ -983,160 +1097,213 @@ class Minesweeper:
 
     def right_click(self, x, y):
         """Обработка правого клика (флаг)"""
-        if self.game_over or self.board[y][x]['revealed']:
+        if self.search is not None:
             return
-
-        # Переключаем флаг
-        self.board[y][x]['flagged'] = not self.board[y][x]['flagged']
-
-        if self.board[y][x]['flagged']:
-            self.flags_placed += 1
-            self.buttons[y][x].config(
-                text="🚩",
-                fg=self.colors['warning'],
-                bg=self.colors['cell_flag']
-            )
-        else:
-            self.flags_placed -= 1
-            self.buttons[y][x].config(
-                text="",
-                bg=self.colors['cell_hidden']
-            )
-
-        self.update_info()
-        self.check_win()
+        self.play(FLAG, x, y)
 
     def middle_click(self, x, y):
         """Обработка среднего клика (быстрое открытие)"""
-        if not self.board[y][x]['revealed'] or self.board[y][x]['neighbors'] == 0:
+        if self.search is not None:
             return
+        self.play(CHORD, x, y)
+
+    def play(self, action, x, y):
+        """Сделать ход движком, записав его в повтор партии"""
+        engine = self.engine
+        if isinstance(engine, MinesweeperEngine) and not engine.game_over:
+            if not self.replay.move_count:
+                self.journal.start(self.width, self.height, self.mine_count, engine.seed)
+            moves = self.replay.moves
+            start = len(moves)
+            self.replay.record(action, engine.index(x, y), self.clock.elapsed_ms())
+            self.journal.append(moves[start:])
+        move = (engine.reveal, engine.toggle_flag, engine.chord)[action]
+        self.apply_move(move(x, y))
+
+        if self.autosave and not engine.game_over:
+            self.moves_since_save += 1
+            if self.moves_since_save >= self.AUTOSAVE_MOVES:
+                self.save_game()
+
+    def apply_move(self, result):
+        """Отобразить результат хода движка"""
+        # Первый ход - запуск таймера
+        if result.started:
+            self.clock.start()
+
+        # Клетки перерисуются разом в ближайший цикл простоя
+        self.board_view.invalidate(result.changed)
+        self.update_info()
 
-        # Подсчет флагов вокруг
-        flag_count = 0
-        for dy in range(-1, 2):
-            for dx in range(-1, 2):
-                if dx == 0 and dy == 0:
-                    continue
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if self.board[ny][nx]['flagged']:
-                        flag_count += 1
-
-        # Если флагов столько же, сколько соседей-мин
-        if flag_count == self.board[y][x]['neighbors']:
-            for dy in range(-1, 2):
-                for dx in range(-1, 2):
-                    if dx == 0 and dy == 0:
-                        continue
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < self.width and 0 <= ny < self.height:
-                        if not self.board[ny][nx]['revealed'] and not self.board[ny][nx]['flagged']:
-                            self.left_click(nx, ny)
-
-    def reveal_neighbors(self, x, y):
-        """Рекурсивно открыть соседей"""
-        for dy in range(-1, 2):
-            for dx in range(-1, 2):
-                if dx == 0 and dy == 0:
-                    continue
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if not self.board[ny][nx]['revealed'] and not self.board[ny][nx]['flagged']:
-                        self.board[ny][nx]['revealed'] = True
-                        self.revealed_count += 1
-                        self.update_button(nx, ny)
-                        if self.board[ny][nx]['neighbors'] == 0:
-                            self.reveal_neighbors(nx, ny)
-
-    def update_button(self, x, y):
-        """Обновить внешний вид кнопки"""
-        cell = self.board[y][x]
-        btn = self.buttons[y][x]
-
-        if cell['revealed']:
-            btn.config(
-                relief=tk.SUNKEN,
-                bg=self.colors['cell_revealed'],
-                state=tk.DISABLED
-            )
-            if cell['is_mine']:
-                btn.config(
-                    text="💣",
-                    fg=self.colors['danger'],
-                    bg=self.colors['cell_mine']
-                )
-            elif cell['neighbors'] > 0:
-                color = self.number_colors.get(cell['neighbors'], self.colors['text'])
-                btn.config(text=str(cell['neighbors']), fg=color)
+        if result.exploded or result.won:
+            self.clock.stop()
+            self.update_timer(self.clock.elapsed_ms())
+
+            # Перед модальным сообщением поле должно быть дорисовано
+            self.board_view.flush()
+            self.save_replay()
+            self.discard_save()
+            self.journal.discard()
+            if result.exploded:
+                self.record_game(False, self.clock.elapsed_ms())
+                self.show_game_over_message(False)
             else:
-                btn.config(text="")
+                self.handle_win()
+
+    def show_hint(self):
+        """Подсветить безопасную клетку или, если ее нет, наименее опасную"""
+        engine = self.engine
+        if not isinstance(engine, MinesweeperEngine) or engine.game_over or engine.first_move:
+            return
+        solver = ConstraintSolver(engine)
+        i = solver.next_safe()
+        if i is not None:
+            text, color = "✓", self.colors['success']
         else:
-            btn.config(
-                relief=tk.RAISED,
-                state=tk.NORMAL,
-                bg=self.colors['cell_hidden'] if not cell['flagged'] else self.colors['cell_flag']
-            )
+            try:
+                i, probability = ProbabilityEngine(solver).best_guess()
+            except ValueError:
+                # Флаги противоречат числам - подсказать нечего
+                messagebox.showinfo("💡 Подсказка", "Флаги расставлены с ошибкой: проверьте их.")
+                return
+            text, color = f"{round(probability * 100)}%", self.colors['warning']
+        y, x = divmod(i, engine.width)
+        self.board_view.flush()
+        self.board_view.center_on(x, y)
+        self.board_view.highlight(x, y, text, color)
+
+    def save_replay(self):
+        """Записать повтор законченной партии в фоне; путь к файлу или None"""
+        self.last_replay = None
+        if not isinstance(self.engine, MinesweeperEngine) or not self.replay.move_count:
+            return None
+        data = self.replay.to_bytes(self.width, self.height, self.mine_count, self.engine.seed)
+        path = replay_path(self.replay_dir, datetime.now(), self.engine.seed)
+        self.last_replay = (path, data)
+
+        def write():
+            os.makedirs(self.replay_dir, exist_ok=True)
+            write_atomic(path, data)
+        self.replay_writer.submit(path, write)
+        return path
+
+    def save_game(self):
+        """Сохранить незаконченную партию в фоне (законченную или не начатую - удалить)"""
+        self.moves_since_save = 0
+        engine = self.engine
+        if (not isinstance(engine, MinesweeperEngine) or engine.first_move or engine.game_over
+                or self.search is not None):
+            self.discard_save()
+            return
+        data = snapshot.dump(engine, self.clock.elapsed_ms(), self.current_difficulty,
+                             bytes(self.replay.moves))
+        self.replay_writer.submit(self.save_file, lambda: write_atomic(self.save_file, data))
+
+    def discard_save(self):
+        """Удалить файл сохранения (в том же фоновом потоке, что и запись)"""
+        self.moves_since_save = 0
+
+        def remove():
+            try:
+                os.remove(self.save_file)
+            except FileNotFoundError:
+                pass
+        self.replay_writer.submit(self.save_file, remove)
 
-    def reveal_all_mines(self):
-        """Показать все мины при поражении"""
-        for y, x in self.mines:
-            self.board[x][y]['revealed'] = True
-            self.update_button(y, x)
-
-    def check_win(self):
-        """Проверить условия победы"""
-        # Все не-мины открыты
-        all_safe_revealed = True
-        for y in range(self.height):
-            for x in range(self.width):
-                if not self.board[y][x]['is_mine'] and not self.board[y][x]['revealed']:
-                    all_safe_revealed = False
-                    break
-            if not all_safe_revealed:
-                break
-
-        # Или все мины помечены флагами
-        if not all_safe_revealed:
-            all_mines_flagged = True
-            for y, x in self.mines:
-                if not self.board[x][y]['flagged']:
-                    all_mines_flagged = False
-                    break
-            if all_mines_flagged:
-                # Проверяем, что нет лишних флагов
-                flag_count = 0
-                for y in range(self.height):
-                    for x in range(self.width):
-                        if self.board[y][x]['flagged']:
-                            flag_count += 1
-                all_safe_revealed = (flag_count == self.mine_count)
-
-        if all_safe_revealed and not self.game_won:
-            self.game_won = True
-            self.game_over = True
-            elapsed_time = int(time.time() - self.start_time) if self.start_time else 0
-
-            # Показываем сообщение о победе
-            self.show_game_over_message(True)
-
-            # Проверяем, является ли результат рекордом
-            if self.current_difficulty in ["easy", "medium", "hard", "custom"]:
-                records_for_diff = self.records.get(self.current_difficulty, [])
-                is_record = True
-
-                if records_for_diff:
-                    # Проверяем, входит ли время в топ-10
-                    if len(records_for_diff) >= 10:
-                        worst_time = max(r["time"] for r in records_for_diff)
-                        if elapsed_time > worst_time:
-                            is_record = False
-
-                if is_record:
-                    self.add_record(self.current_difficulty, elapsed_time)
+    def load_saved_game(self):
+        """Незаконченная партия с диска: (движок, мс партии, уровень, запись ходов) или None
+
+        Журнал ходов остается только после аварийного завершения и новее
+        снимка, поэтому проверяется первым.
+        """
+        try:
+            engine, recorder = journal.recover(self.journal_file)
+            if not engine.first_move and not engine.game_over:
+                size = (engine.width, engine.height, engine.mine_count)
+                difficulty = next((name for name, preset in PRESETS.items() if preset == size),
+                                  "custom")
+                return engine, recorder.last_ms, difficulty, recorder
+        except (OSError, ValueError):
+            pass
+        try:
+            with open(self.save_file, 'rb') as f:
+                engine, elapsed_ms, difficulty, moves = snapshot.load(f.read())
+            recorder = ReplayRecorder()
+            recorder.restore(moves)
+            return engine, elapsed_ms, difficulty, recorder
+        except (OSError, ValueError):
+            return None
+
+    def resume_game(self):
+        """Предложить продолжить сохраненную партию; True, если она восстановлена"""
+        saved = self.load_saved_game()
+        if saved is None:
+            return False
+        engine, elapsed_ms, difficulty, recorder = saved
+        if not messagebox.askyesno(
+                "💾 Сохраненная партия",
+                f"Продолжить незаконченную партию?\n\n"
+                f"Размер поля: {engine.width}×{engine.height}, мин: {engine.mine_count}\n"
+                f"Время: {format_seconds(elapsed_ms)} секунд",
+                parent=self.root):
+            return False
+
+        self.engine = engine
+        self.width, self.height, self.mine_count = engine.width, engine.height, engine.mine_count
+        self.current_difficulty = difficulty
+        self.replay = recorder
+        self.journal.start(self.width, self.height, self.mine_count, engine.seed,
+                           bytes(recorder.moves))
+        self.cell_size = self.calculate_cell_size()
+        self.create_board_view()
+        self.board_view.redraw()
+        self.update_info()
+        self.clock.restore(elapsed_ms)
+        self.center_window()
+        return True
+
+    def exit_game(self):
+        """Выход из игры с сохранением незаконченной партии"""
+        self.save_game()
+        self.journal.discard()
+        self.root.quit()
+
+    def handle_win(self):
+        """Показать победу и занести результат в таблицу рекордов"""
+        # Официальное время - момент победного хода, записанный в повторе
+        elapsed_ms = self.replay.last_ms
+
+        # Показываем сообщение о победе
+        self.show_game_over_message(True, elapsed_ms)
+
+        # Победа попадает в таблицу, только если ее подтверждает повтор
+        verified = False
+        if self.last_replay is not None:
+            verified, _ = verify.verify_replay_bytes(self.last_replay[1], {
+                "width": self.width,
+                "height": self.height,
+                "mines": self.mine_count,
+                "seed": self.engine.seed,
+                "time_ms": elapsed_ms,
+            })
+
+        # Проверяем, является ли результат рекордом для этого размера поля, до записи партии
+        key = board_key(self.width, self.height, self.mine_count)
+        is_record = (verified and self.current_difficulty in DIFFICULTIES
+                     and self.records.qualifies(key, elapsed_ms))
+        self.record_game(True, elapsed_ms, verified)
+        if is_record:
+            self.add_record(self.current_difficulty, elapsed_ms)
 
     def update_info(self):
         """Обновить информацию на панели"""
-        mines_left = self.mine_count - self.flags_placed
+        if self.current_difficulty == "infinite":
+            # Мин бесконечно много - показываем число флагов
+            self.mines_label.config(text=f" 🚩{self.engine.flags_placed}", fg=self.colors['warning'])
+            self.player_label.config(text=f" {self.player_name}")
+            return
+
+        mines_left = self.mine_count - self.engine.flags_placed
         self.mines_label.config(
             text=f" {mines_left}",
             fg=self.colors['warning'] if mines_left > 0 else self.colors['success']
@@ -1145,18 +1312,23 @@ class Minesweeper:
         # Обновляем имя игрока
         self.player_label.config(text=f" {self.player_name}")
 
-    def update_timer(self):
-        """Обновить таймер"""
-        if self.start_time and not self.game_over:
-            elapsed_time = int(time.time() - self.start_time)
-            self.time_label.config(
-                text=f" {elapsed_time} сек",
-                fg=self.colors['success'] if elapsed_time < 100 else
-                (self.colors['warning'] if elapsed_time < 300 else self.colors['danger'])
-            )
+    def update_timer(self, elapsed_ms):
+        """Обновить таймер (вызывается часами партии)"""
+        elapsed_time = elapsed_ms // 1000
+        self.time_label.config(
+            text=f" {elapsed_time} сек",
+            fg=self.colors['success'] if elapsed_time < 100 else
+            (self.colors['warning'] if elapsed_time < 300 else self.colors['danger'])
+        )
 
-        # Планируем следующее обновление через 1 секунду
-        self.root.after(1000, self.update_timer)
+    def on_focus_change(self, event, focused):
+        """Пауза часов, пока главное окно не в фокусе"""
+        if event.widget is not self.root:
+            return
+        if focused:
+            self.clock.resume()
+        else:
+            self.clock.pause()
 
     def show_help(self):
         """Показать справку в морском стиле"""
@@ -1203,9 +1375,10 @@ class Minesweeper:
              self.colors['text']),
 
             ("📏 ОГРАНИЧЕНИЯ",
-             f"• Максимальная ширина поля: {self.MAX_WIDTH} клеток\n"
-             "• Максимальная высота поля: 30 клеток\n"
-             "• Размер клеток автоматически адаптируется\n"
+             f"• Холст: поле до {self.MAX_BOARD_SIDE}×{self.MAX_BOARD_SIDE} клеток\n"
+             f"• Кнопки: ширина до {self.MAX_WIDTH}, высота до {self.MAX_HEIGHT} клеток\n"
+             "• Большое поле прокручивается колесиком мыши (Shift - по горизонтали)\n"
+             "• Ctrl + колесико - масштаб клеток\n"
              "• Окно игры центрируется на экране",
              self.colors['accent']),
 
@@ -1224,10 +1397,11 @@ class Minesweeper:
              self.colors['text_secondary']),
 
             ("⚙️ УРОВНИ СЛОЖНОСТИ",
-             f"• 🌊 Новичок: 9×9 поле, 10 мин (макс. ширина {self.MAX_WIDTH})\n"
-             f"• ⚓ Любитель: 16×16 поле, 40 мин (макс. ширина {self.MAX_WIDTH})\n"
-             f"• 🚢 Профессионал: 16×30 поле, 99 мин (макс. ширина {self.MAX_WIDTH})\n"
-             f"• 🧭 Пользовательский: настройте размер до {self.MAX_WIDTH}×30",
+             "• 🌊 Новичок: 9×9 поле, 10 мин\n"
+             "• ⚓ Любитель: 16×16 поле, 40 мин\n"
+             "• 🚢 Профессионал: 16×30 поле, 99 мин\n"
+             f"• 🧭 Пользовательский: настройте размер до {self.MAX_BOARD_SIDE}×{self.MAX_BOARD_SIDE}\n"
+             "• 🧠 Без угадываний: поле подбирается так, чтобы его можно было пройти одной логикой",
              self.colors['text']),
 
             ("👤 СИСТЕМА ИМЕН",
@@ -1239,7 +1413,8 @@ class Minesweeper:
 
             ("🏆 СИСТЕМА РЕКОРДОВ",
              "• Таблица рекордов сохраняется автоматически\n"
-             "• Топ-10 результатов для каждого уровня сложности\n"
+             "• Топ-10 для каждого размера поля (ширина, высота, мины):\n"
+             "  у каждого пользовательского поля своя таблица\n"
              "• Ваши рекорды подсвечиваются в таблице\n"
              "• Имя игрока отображается рядом с каждым рекордом",
              self.colors['success']),
@@ -1253,8 +1428,9 @@ class Minesweeper:
 
             ("⌨️ ГОРЯЧИЕ КЛАВИШИ",
              "• Ctrl+N - Новая игра\n"
-             "• Ctrl+Q - Выход\n"
-             "• F2 - Таблица рекордов",
+             "• Ctrl+Q - Выход (незаконченная партия сохраняется и продолжается при запуске)\n"
+             "• F2 - Таблица рекордов\n"
+             "• H - Подсказка: безопасная клетка или шанс мины в наименее опасной",
              self.colors['text']),
         ]
 
@@ -1318,8 +1494,8 @@ class Minesweeper:
 {'=' * 50}
 
 📏 ОГРАНИЧЕНИЯ РАЗМЕРА:
-• Максимальная ширина поля: {self.MAX_WIDTH} клеток
-• Максимальная высота поля: 30 клеток
+• Холст с прокруткой: до {self.MAX_BOARD_SIDE}×{self.MAX_BOARD_SIDE} клеток
+• Поле из кнопок: до {self.MAX_WIDTH}×{self.MAX_HEIGHT} клеток
 • Автоматическая адаптация размера клеток
 
 🎨 ДИЗАЙН:
@@ -1332,17 +1508,18 @@ class Minesweeper:
 • Все рекорды привязываются к имени
 
 🏆 ТАБЛИЦА РЕКОРДОВ:
-• Автоматическое сохранение в JSON формате
-• Отдельные таблицы для каждого уровня сложности
+• Автоматическое сохранение в базе SQLite (история всех партий)
+• Отдельная таблица для каждого размера поля и числа мин
 • Подсветка ваших рекордов в таблице
 
 ⚙️ ТЕХНОЛОГИИ:
 • Python 3.x с графическим интерфейсом Tkinter
-• JSON для хранения данных
+• SQLite для хранения данных (JSON, если модуль sqlite3 недоступен)
 • Адаптивный дизайн под разные размеры поля
 
 📁 СОХРАНЕНИЕ ДАННЫХ:
-• Рекорды: minesweeper_records.json
+• Рекорды: minesweeper_records.db
+• Прежние рекорды: minesweeper_records.json (переносятся в базу)
 • Имя игрока: player_name.txt
 
 🎯 ЦЕЛЬ ПРОЕКТА:
@@ -1364,16 +1541,26 @@ class Minesweeper:
 
         # Запуск главного цикла
         self.root.mainloop()
+        self.records.close()
+        self.journal.close()
+        self.replay_writer.close()
 
+        if self.search_executor is not None:
+            self.search_executor.shutdown(wait=False, cancel_futures=True)
 
-def main():
+
+def main(argv=None):
     """Точка входа в программу"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
     print("=" * 70)
-    print("🌊 МОРСКОЙ САПЕР - ВЕРСИЯ С ОГРАНИЧЕНИЕМ ШИРИНЫ 🌊".center(70))
+    print("🌊 МОРСКОЙ САПЕР 🌊".center(70))
     print("=" * 70)
     print("\n📏 ОГРАНИЧЕНИЯ РАЗМЕРА:")
-    print(f"  • Максимальная ширина поля: 16 клеток")
-    print("  • Максимальная высота поля: 30 клеток")
+    print("  • Холст с прокруткой: до 3000x3000 клеток")
+    print("  • Поле из кнопок: до 16x30 клеток")
     print("  • Автоматическая адаптация размера клеток")
     print("\n👤 СИСТЕМА ИМЕН:")
     print("  • Имя сохраняется между играми")
@@ -1383,20 +1570,28 @@ def main():
     print("  1. 🌊 Новичок: 9x9, 10 мин")
     print("  2. ⚓ Любитель: 16x16, 40 мин")
     print("  3. 🚢 Профессионал: 16x30, 99 мин")
-    print("  4. 🧭 Пользовательский: настройте сами (до 16x30)")
+    print("  4. 🧭 Пользовательский: настройте сами (до 3000x3000)")
     print("\n🖱️ Управление:")
     print("  ЛКМ - открыть клетку")
     print("  ПКМ - поставить/убрать флаг 🚩")
     print("  СКМ - быстрое открытие соседей")
     print("  F2 - таблица рекордов 🏆")
+    print("  H - подсказка 💡")
     print("\n💾 Сохранение:")
-    print("  Рекорды: minesweeper_records.json")
+    print("  Рекорды: minesweeper_records.db (без sqlite3 - minesweeper_records.json)")
     print("  Имя игрока: player_name.txt")
+    print("  Незаконченная партия: minesweeper_save.bin (продолжается при следующем запуске)")
+    print("  Журнал ходов: minesweeper_journal.msr (восстанавливает партию после сбоя)")
+    print("\n🧪 Консольные команды:")
+    print("  python m3.py simulate --width 30 --height 16 --mines 99 --games 1000 --workers 8")
+    print("  python m3.py bench --output bench_results.json")
+    print("  python m3.py analyze replays")
+    print("  python m3.py verify")
     print("=" * 70)
 
     try:
         # Проверяем, установлен ли tkinter
-        import tkinter
+        _load_tk()
         print("\n✅ Запуск игры...")
 
         # Создаем и запускаем игру
@@ -1414,10 +1609,4 @@ def main():
 
 
 if __name__ == "__main__":
-    # Необходимо для работы notebook (вкладок) в tkinter
-    try:
-        from tkinter import ttk
-
-        main()
-    except ImportError:
-        print("❌ Ошибка: не удалось импортировать ttk из tkinter")
\ No newline at end of file
+    sys.exit(main())
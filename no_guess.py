@@ -0,0 +1,102 @@
+"""Поиск полей, которые проходятся без угадывания"""
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from engine import MinesweeperEngine
+from solver import ConstraintSolver
+
+BATCH = 32  # Зерен на одну задачу процесса: мелкие задачи быстрее отменяются
+
+
+def is_solvable(width, height, mine_count, safe_x, safe_y, seed):
+    """Проходится ли поле с этим зерном одной логикой от первого хода"""
+    engine = MinesweeperEngine(width, height, mine_count, seed=seed)
+    engine.reveal(safe_x, safe_y)
+    solver = ConstraintSolver(engine)
+    while not engine.game_over:
+        i = solver.next_safe()
+        if i is None:
+            return False
+        y, x = divmod(i, width)
+        result = engine.reveal(x, y)
+        solver.update(result.changed)
+    return engine.game_won
+
+
+def search_seeds(width, height, mine_count, safe_x, safe_y, first_seed, count):
+    """Первое подходящее зерно из диапазона или None (выполняется в процессе пула)"""
+    for seed in range(first_seed, first_seed + count):
+        if is_solvable(width, height, mine_count, safe_x, safe_y, seed):
+            return seed
+    return None
+
+
+class NoGuessSearch:
+    """Параллельный перебор зерен в пуле процессов
+
+    Кандидаты - последовательные зерна от случайного начала, которые
+    раздаются пулу пачками по BATCH. В работе держится по две пачки на
+    процесс; poll() не блокирует, поэтому интерфейс может опрашивать поиск
+    через root.after. Зерно однозначно задает поле при данном первом ходе,
+    так что найденное зерно достаточно передать в MinesweeperEngine.reset().
+    """
+
+    def __init__(self, executor, workers, width, height, mine_count, safe_x, safe_y,
+                 max_attempts=20000, seed=None):
+        self.executor = executor
+        self.args = (width, height, mine_count, safe_x, safe_y)
+        self.in_flight = workers * 2
+        self.next_seed = seed if seed is not None else random.getrandbits(64)
+        self.remaining = max_attempts  # Сколько зерен еще можно раздать
+        self.futures = set()
+        self.done = False
+        self.seed = None  # Найденное зерно (None - поиск не удался или еще идет)
+        self._submit()
+
+    def _submit(self):
+        """Дополнить очередь задач до in_flight пачек"""
+        while len(self.futures) < self.in_flight and self.remaining > 0:
+            count = min(BATCH, self.remaining)
+            self.futures.add(self.executor.submit(search_seeds, *self.args, self.next_seed, count))
+            self.next_seed += count
+            self.remaining -= count
+
+    def poll(self):
+        """Проверить готовые пачки; True, когда поиск закончен"""
+        if self.done:
+            return True
+        for future in [f for f in self.futures if f.done()]:
+            self.futures.discard(future)
+            seed = future.result()
+            if seed is not None:
+                self.seed = seed
+                self.cancel()
+                return True
+        self._submit()
+        if not self.futures:
+            self.done = True
+        return self.done
+
+    def wait(self):
+        """Дождаться конца поиска и вернуть зерно или None"""
+        while not self.poll():
+            wait(self.futures, return_when=FIRST_COMPLETED)
+        return self.seed
+
+    def cancel(self):
+        """Прекратить поиск; уже запущенные пачки досчитаются впустую"""
+        for future in self.futures:
+            future.cancel()
+        self.futures.clear()
+        self.done = True
+
+
+def find_no_guess_seed(width, height, mine_count, safe_x, safe_y, workers=None,
+                       max_attempts=20000, seed=None):
+    """Найти зерно поля без угадывания, заняв все ядра; None, если не нашлось"""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        search = NoGuessSearch(executor, workers, width, height, mine_count,
+                               safe_x, safe_y, max_attempts, seed)
+        return search.wait()
@@ -0,0 +1,553 @@
+"""Хранение сыгранных партий и таблиц рекордов"""
+import json
+import os
+import pathlib
+import sys
+import threading
+import traceback
+from bisect import bisect_right
+
+try:
+    import sqlite3
+except ImportError:  # Без sqlite3 рекорды хранятся в прежнем JSON-файле
+    sqlite3 = None
+
+from clock import record_time_ms
+
+# Ошибки записи на диск, о которых сообщается, не прерывая игру
+WRITE_ERRORS = (OSError,) if sqlite3 is None else (OSError, sqlite3.Error)
+# Ошибки открытия хранилища только для чтения (нет файла, чужой файл, старая схема)
+READ_ERRORS = WRITE_ERRORS + (ValueError,)
+
+DIFFICULTIES = ("easy", "medium", "hard", "custom")
+TOP_SIZE = 10  # Сколько лучших результатов показывает таблица рекордов
+
+# Конфигурации поля предустановленных уровней (ширина, высота, мины)
+PRESETS = {
+    "easy": (9, 9, 10),
+    "medium": (16, 16, 40),
+    "hard": (16, 30, 99),
+}
+LEGACY_CUSTOM = None  # Ключ старых пользовательских рекордов без размера поля
+
+
+def board_key(width, height, mines):
+    """Ключ таблицы рекордов: своя таблица для каждой конфигурации поля"""
+    return (width, height, mines)
+
+
+def _record(game):
+    """Запись таблицы рекордов из описания партии"""
+    return {
+        "name": game["name"],
+        "time": game["time_ms"] / 1000,
+        "time_ms": game["time_ms"],
+        "date": game["date"],
+        "difficulty": game["difficulty"],
+        "width": game["width"],
+        "height": game["height"],
+        "mines": game["mines"],
+        "seed": game.get("seed"),
+        "replay": game.get("replay"),
+        "legacy": bool(game.get("legacy", False)),
+    }
+
+
+def ranked(game):
+    """Может ли победа стоять в таблице рекордов
+
+    Нужна проверка повтором; без нее допускаются только старые рекорды
+    (legacy), перенесенные из времени, когда повторов еще не было.
+    """
+    return bool(game.get("verified") or game.get("legacy"))
+
+
+class Leaderboards:
+    """Топ-K по времени для каждой конфигурации поля
+
+    У каждого ключа - отсортированный список времен и параллельный список
+    записей, поэтому проверка «попадает ли время в топ» - один бинарный
+    поиск, а вставка - bisect и сдвиг не более K элементов. Число
+    конфигураций на скорость не влияет.
+    """
+
+    def __init__(self, size=TOP_SIZE):
+        self.size = size
+        self.boards = {}  # Ключ -> (times, records)
+
+    def qualifies(self, key, time_ms):
+        """Попадет ли время в топ конфигурации"""
+        board = self.boards.get(key)
+        if board is None or len(board[0]) < self.size:
+            return True
+        return time_ms < board[0][-1]
+
+    def add(self, key, record):
+        """Вставить запись, если она проходит в топ; True, если вставлена"""
+        times, records = self.boards.setdefault(key, ([], []))
+        time_ms = record_time_ms(record)
+        position = bisect_right(times, time_ms)
+        if position >= self.size:
+            return False
+        times.insert(position, time_ms)
+        records.insert(position, record)
+        if len(times) > self.size:
+            times.pop()
+            records.pop()
+        return True
+
+    def top(self, key):
+        """Записи конфигурации от лучшей к худшей"""
+        board = self.boards.get(key)
+        return list(board[1]) if board is not None else []
+
+    def keys(self):
+        """Конфигурации, для которых есть рекорды"""
+        return list(self.boards)
+
+    def clear(self):
+        self.boards.clear()
+
+
+def write_atomic(path, data):
+    """Записать файл целиком или не менять его вовсе
+
+    Данные (строка или bytes) пишутся во временный файл рядом,
+    сбрасываются на диск (fsync) и только потом подменяют старый файл
+    через os.replace. При ошибке временный файл удаляется, а OSError
+    передается вызывающему.
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        if isinstance(data, bytes):
+            f = open(tmp_path, 'wb')
+        else:
+            f = open(tmp_path, 'w', encoding='utf-8')
+        with f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def report_write_error(error, source="records"):
+    """Сообщить о неудачной записи в stderr (source - кто писал)"""
+    print(f"[{source}] Ошибка записи на диск: {error}", file=sys.stderr)
+
+
+class BackgroundWriter:
+    """Поток записи на диск вне главного цикла Tk
+
+    Задачи ставятся по ключу: пока поток занят, новая задача с тем же ключом
+    заменяет ждущую (серия сохранений превращается в одну запись), но
+    переносится в конец очереди, чтобы порядок разных задач сохранялся.
+    """
+
+    def __init__(self, name="records-writer"):
+        self.name = name  # Имя потока - видно в дампах потоков и сообщениях об ошибках
+        self.pending = {}  # Ключ -> функция, ждущая выполнения
+        self.busy = False
+        self.last_error = None  # Последняя ошибка записи (для показа в интерфейсе)
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, key, job):
+        """Поставить задачу записи, заменив ждущую с тем же ключом"""
+        with self.condition:
+            self.pending.pop(key, None)
+            self.pending[key] = job
+            self.condition.notify_all()
+
+    def flush(self):
+        """Дождаться выполнения всех поставленных задач"""
+        with self.condition:
+            while self.pending or self.busy:
+                self.condition.wait()
+
+    def close(self):
+        """Дописать оставшееся и остановить поток"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                jobs = list(self.pending.values())
+                self.pending.clear()
+                self.busy = True
+            for job in jobs:
+                try:
+                    job()
+                except WRITE_ERRORS as error:
+                    self.last_error = error
+                    report_write_error(error, self.name)
+                except Exception as error:
+                    # Ошибка в самой задаче не должна останавливать поток записи
+                    self.last_error = error
+                    print(f"[{self.name}] Ошибка в задаче записи:", file=sys.stderr)
+                    traceback.print_exc()
+            with self.condition:
+                self.busy = False
+                self.condition.notify_all()
+
+
+def load_json_records(path):
+    """Рекорды из JSON-файла парами (ключ, запись)
+
+    Файл старого формата (списки по уровням сложности) читается с переводом
+    уровней в размеры поля. Его записи, как и прежние пользовательские
+    рекорды без размера поля, помечаются как старые (legacy): повторов у них нет.
+    """
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except:
+        return []
+
+    entries = []
+    for name, records in data.items():
+        legacy = False
+        if name in PRESETS:
+            key = board_key(*PRESETS[name])
+            legacy = True
+        elif name == "custom":
+            key = LEGACY_CUSTOM
+            legacy = True
+        else:
+            try:
+                key = board_key(*(int(part) for part in name.split("x")))
+            except:
+                continue
+        entries.extend((key, dict(record, legacy=True) if legacy else record) for record in records)
+    return entries
+
+
+class RecordStore:
+    """Общая часть хранилищ: таблицы рекордов в памяти поверх постоянной записи"""
+
+    def __init__(self):
+        self.leaderboards = Leaderboards()
+
+    def qualifies(self, key, time_ms):
+        """Попадает ли время в топ конфигурации"""
+        return self.leaderboards.qualifies(key, time_ms)
+
+    def top(self, key):
+        """Лучшие результаты конфигурации по времени"""
+        return self.leaderboards.top(key)
+
+    def configurations(self):
+        """Конфигурации поля, для которых есть рекорды"""
+        return self.leaderboards.keys()
+
+    def add_game(self, game):
+        """Учесть законченную партию; подтвержденная победа может попасть в топ"""
+        if game["won"] and ranked(game):
+            self.leaderboards.add(board_key(game["width"], game["height"], game["mines"]),
+                                  _record(game))
+        self._store(game)
+
+    def clear(self):
+        """Удалить все рекорды"""
+        self.leaderboards.clear()
+        self._clear()
+
+    def close(self):
+        pass
+
+
+class JSONRecordStore(RecordStore):
+    """Топ-10 каждой конфигурации поля в одном JSON-файле (без истории партий)
+
+    Таблицы живут в памяти, а файл атомарно перезаписывается фоновым потоком.
+    Ключ в файле - строка "ШИРИНАxВЫСОТАxМИНЫ". Записи без повтора, не
+    помеченные как старые, в таблицы не попадают.
+    """
+
+    def __init__(self, path, writer=None):
+        super().__init__()
+        self.path = path
+        self.writer = writer
+        for key, record in load_json_records(path):
+            if record.get("replay") or record.get("legacy"):
+                self.leaderboards.add(key, record)
+
+    def save(self):
+        """Сохранить таблицы рекордов (в фоне, если есть поток записи)"""
+        data = {}
+        for key in self.leaderboards.keys():
+            name = "custom" if key is LEGACY_CUSTOM else "x".join(map(str, key))
+            data[name] = self.leaderboards.top(key)
+        text = json.dumps(data, indent=2, ensure_ascii=False)
+        if self.writer is None:
+            try:
+                write_atomic(self.path, text)
+            except OSError as error:
+                report_write_error(error)
+        else:
+            self.writer.submit(self.path, lambda: write_atomic(self.path, text))
+
+    def _store(self, game):
+        if game["won"] and ranked(game):
+            self.save()
+
+    def _clear(self):
+        self.save()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class SQLiteRecordStore(RecordStore):
+    """Все законченные партии в базе SQLite
+
+    Хранится каждая партия (игрок, размер поля, мины, время, дата, зерно,
+    исход, файл повтора, прошла ли победа проверку повтором и не старый ли
+    это рекорд без повтора). Индексы по
+    (difficulty, time_ms) и по (width, height, mines, time_ms) среди побед
+    и по игроку; при открытии топ каждой конфигурации
+    выбирается одним запросом с ROW_NUMBER(), дальше таблицы ведутся в
+    памяти. При первом запуске в базу переносятся рекорды из прежнего
+    JSON-файла.
+
+    Вставки идут через фоновый поток со своим соединением: партии,
+    накопившиеся за время записи, попадают в базу одной транзакцией.
+    С read_only база открывается только для чтения: без создания,
+    обновления схемы и переноса JSON.
+    """
+
+    SCHEMA_VERSION = 4
+
+    def __init__(self, path, json_path=None, writer=None, read_only=False):
+        super().__init__()
+        self.path = path
+        self.writer = writer
+        self.pending = []  # Партии, еще не записанные фоновым потоком
+        self.lock = threading.Lock()
+        self.writer_connection = None  # Соединение потока записи
+        if read_only:
+            uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+            self.connection = sqlite3.connect(uri, uri=True)
+            self.connection.row_factory = sqlite3.Row
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.SCHEMA_VERSION:
+                self.connection.close()
+                raise ValueError(f"база {path} версии {version}, нужна {self.SCHEMA_VERSION}"
+                                 f" (запустите игру, чтобы обновить ее)")
+            self._load_leaderboards()
+            return
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._create_schema()
+        if version < 2:
+            self._add_board_index()
+        if version < 3:
+            self._add_replay_columns()
+        if version < 4:
+            self._add_legacy_column()
+        if version < 1 and json_path is not None:
+            self._migrate(json_path)
+        self._load_leaderboards()
+
+    def _create_schema(self):
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS games (
+                    id INTEGER PRIMARY KEY,
+                    player TEXT NOT NULL,
+                    difficulty TEXT NOT NULL,
+                    width INTEGER,
+                    height INTEGER,
+                    mines INTEGER,
+                    time_ms INTEGER NOT NULL,
+                    date TEXT NOT NULL,
+                    seed TEXT,
+                    won INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS games_difficulty_time
+                    ON games (difficulty, time_ms) WHERE won = 1;
+                CREATE INDEX IF NOT EXISTS games_player ON games (player);
+                PRAGMA user_version = 1;
+            """)
+
+    def _add_board_index(self):
+        """Версия 2: индекс по конфигурации поля и размеры у перенесенных рекордов"""
+        with self.connection:
+            for difficulty, (width, height, mines) in PRESETS.items():
+                self.connection.execute(
+                    "UPDATE games SET width = ?, height = ?, mines = ?"
+                    " WHERE difficulty = ? AND width IS NULL",
+                    (width, height, mines, difficulty)
+                )
+            self.connection.executescript("""
+                CREATE INDEX IF NOT EXISTS games_board_time
+                    ON games (width, height, mines, time_ms) WHERE won = 1;
+                PRAGMA user_version = 2;
+            """)
+
+    def _add_replay_columns(self):
+        """Версия 3: ссылка на файл повтора и признак проверенной победы"""
+        with self.connection:
+            self.connection.executescript(f"""
+                ALTER TABLE games ADD COLUMN replay TEXT;
+                ALTER TABLE games ADD COLUMN verified INTEGER NOT NULL DEFAULT 1;
+                PRAGMA user_version = 3;
+            """)
+
+    def _add_legacy_column(self):
+        """Версия 4: старые рекорды без повтора помечаются явно и не считаются проверенными
+
+        Версия 3 ставила verified = 1 всем прежним строкам; теперь проверенной
+        бывает только победа с повтором, а таблицы рекордов берут проверенные
+        победы и старые (legacy).
+        """
+        with self.connection:
+            self.connection.executescript(f"""
+                ALTER TABLE games ADD COLUMN legacy INTEGER NOT NULL DEFAULT 0;
+                UPDATE games SET legacy = 1, verified = 0 WHERE replay IS NULL AND verified = 1;
+                PRAGMA user_version = {self.SCHEMA_VERSION};
+            """)
+
+    def _migrate(self, json_path):
+        """Перенести рекорды из JSON-файла (файл остается на месте)
+
+        Записи с повтором переносятся проверенными, старые - с пометкой legacy,
+        остальные (без повтора и без пометки) - непроверенными, вне таблиц рекордов.
+        """
+        games = []
+        for key, record in load_json_records(json_path):
+            try:
+                width, height, mines = key if key is not LEGACY_CUSTOM else (None, None, None)
+                games.append({
+                    "name": record["name"],
+                    "difficulty": record.get("difficulty", "custom"),
+                    "width": width,
+                    "height": height,
+                    "mines": mines,
+                    "time_ms": record_time_ms(record),
+                    "date": record["date"],
+                    "seed": record.get("seed"),
+                    "won": True,
+                    "replay": record.get("replay"),
+                    "verified": bool(record.get("replay")),
+                    "legacy": bool(record.get("legacy")) and not record.get("replay"),
+                })
+            except:
+                pass
+        self._insert(self.connection, games)
+
+    def _load_leaderboards(self):
+        """Топ каждой конфигурации одним запросом по индексу"""
+        rows = self.connection.execute("""
+            SELECT player, difficulty, width, height, mines, time_ms, date, seed, replay, legacy FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY width, height, mines ORDER BY time_ms, id
+                ) AS place
+                FROM games
+                WHERE won = 1 AND (verified = 1 AND replay IS NOT NULL OR legacy = 1)
+            ) WHERE place <= ?
+        """, (self.leaderboards.size,)).fetchall()
+        for row in rows:
+            key = board_key(row["width"], row["height"], row["mines"])
+            if row["width"] is None:
+                key = LEGACY_CUSTOM
+            self.leaderboards.add(key, _record(dict(row, name=row["player"])))
+
+    def _insert(self, connection, games):
+        with connection:
+            connection.executemany(
+                "INSERT INTO games (player, difficulty, width, height, mines, time_ms, date, seed, won,"
+                " replay, verified, legacy) VALUES (:name, :difficulty, :width, :height, :mines,"
+                " :time_ms, :date, :seed, :won, :replay, :verified, :legacy)",
+                [dict(game, seed=None if game["seed"] is None else str(game["seed"]),
+                      time_ms=int(game["time_ms"]), won=int(game["won"]),
+                      replay=game.get("replay"), verified=int(game.get("verified", False)),
+                      legacy=int(game.get("legacy", False)))
+                 for game in games]
+            )
+
+    def _store(self, game):
+        """Записать партию в историю"""
+        if self.writer is None:
+            try:
+                self._insert(self.connection, [game])
+            except sqlite3.Error as error:
+                report_write_error(error)
+            return
+        with self.lock:
+            self.pending.append(game)
+        self.writer.submit("insert", self._write_pending)
+
+    def _write_pending(self):
+        """Записать накопленные партии (в потоке записи)"""
+        with self.lock:
+            games, self.pending = self.pending, []
+        if not games:
+            return
+        if self.writer_connection is None:
+            self.writer_connection = sqlite3.connect(self.path)
+        self._insert(self.writer_connection, games)
+
+    def _clear(self):
+        """Удалить всю историю партий"""
+        with self.lock:
+            self.pending.clear()
+        if self.writer is not None:
+            self.writer.flush()
+        with self.connection:
+            self.connection.execute("DELETE FROM games")
+
+    def close(self):
+        if self.writer is not None:
+            # Соединение потока записи закрывается в самом потоке
+            self.writer.submit("close", self._close_writer_connection)
+            self.writer.close()
+        self.connection.close()
+
+    def _close_writer_connection(self):
+        if self.writer_connection is not None:
+            self.writer_connection.close()
+            self.writer_connection = None
+
+
+def open_record_store(db_path, json_path, read_only=False):
+    """База SQLite, если модуль sqlite3 доступен, иначе JSON-файл
+
+    Запись в обоих случаях идет фоновым потоком. С read_only хранилище
+    только читается: отсутствующий файл дает FileNotFoundError, а не
+    создается, ошибки чтения (READ_ERRORS) передаются вызывающему.
+    """
+    if read_only:
+        path = db_path if sqlite3 is not None else json_path
+        if not os.path.exists(path):
+            raise FileNotFoundError(2, "Файл рекордов не найден", path)
+        if sqlite3 is not None:
+            return SQLiteRecordStore(db_path, read_only=True)
+        return JSONRecordStore(json_path)
+
+    if sqlite3 is not None:
+        try:
+            return SQLiteRecordStore(db_path, json_path, BackgroundWriter())
+        except sqlite3.Error:
+            pass
+    return JSONRecordStore(json_path, BackgroundWriter())
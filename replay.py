@@ -0,0 +1,135 @@
+"""Компактная двоичная запись партий (повторы)
+
+Файл повтора: сигнатура MAGIC, затем беззнаковые varint-числа заголовка
+(ширина, высота, мины, зерно) и ходы. Ход - два varint: (индекс клетки << 2) | действие
+и время в миллисекундах с предыдущего хода. Поле однозначно задается
+зерном и первым ходом, поэтому больше ничего хранить не нужно.
+"""
+import io
+import os
+
+MAGIC = b"MSR1"
+MAX_SIDE = 10000  # Предел стороны поля в файлах (с запасом над пределом холста)
+
+# Действия хода (младшие два бита первого числа)
+REVEAL = 0
+FLAG = 1
+CHORD = 2
+
+
+def write_varint(buffer, value):
+    """Дописать неотрицательное число в буфер по 7 бит на байт"""
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+class ReplayRecorder:
+    """Буфер ходов текущей партии
+
+    Запись хода - два varint в bytearray, без объектов на каждый клик;
+    ход на поле «Профессионал» занимает 2-4 байта.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Начать запись новой партии"""
+        self.moves = bytearray()
+        self.move_count = 0
+        self.last_ms = 0
+
+    def record(self, action, index, time_ms):
+        """Записать ход: действие над клеткой index в момент time_ms от начала партии"""
+        moves = self.moves
+        write_varint(moves, index << 2 | action)
+        write_varint(moves, max(time_ms - self.last_ms, 0))
+        self.last_ms = max(time_ms, self.last_ms)
+        self.move_count += 1
+
+    def restore(self, moves):
+        """Продолжить запись с уже сделанных ходов (закодированных как в self.moves)"""
+        self.reset()
+        numbers = iter_varints(io.BytesIO(moves))
+        for _ in numbers:
+            delta = next(numbers, None)
+            if delta is None:
+                raise ValueError("Файл повтора обрезан")
+            self.last_ms += delta
+            self.move_count += 1
+        self.moves = bytearray(moves)
+
+    def to_bytes(self, width, height, mine_count, seed):
+        """Содержимое файла повтора"""
+        data = bytearray(MAGIC)
+        for value in (width, height, mine_count, seed):
+            write_varint(data, value)
+        data += self.moves
+        return bytes(data)
+
+
+def replay_path(directory, date, seed):
+    """Имя файла повтора: время окончания партии и зерно"""
+    return os.path.join(directory, f"{date:%Y%m%d-%H%M%S}-{seed:016x}.msr")
+
+
+def iter_varints(stream, chunk_size=65536):
+    """Поток varint-чисел из двоичного файла, читаемого кусками"""
+    value = shift = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        for byte in chunk:
+            value |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+            else:
+                yield value
+                value = shift = 0
+    if shift:
+        raise ValueError("Файл повтора обрезан")
+
+
+class Replay:
+    """Заголовок повтора и ленивый поток его ходов
+
+    Файл не читается целиком: ходы разбираются по мере перебора moves(),
+    так что память не зависит от длины партии.
+    """
+
+    def __init__(self, stream):
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Это не файл повтора")
+        self.numbers = iter_varints(stream)
+        header = [next(self.numbers, None) for _ in range(4)]
+        if None in header:
+            raise ValueError("Файл повтора обрезан")
+        self.width, self.height, self.mine_count, self.seed = header
+        if not (1 <= self.width <= MAX_SIDE and 1 <= self.height <= MAX_SIDE
+                and self.mine_count < self.width * self.height):
+            raise ValueError("Неверный заголовок повтора")
+
+    def moves(self):
+        """Ходы (действие, индекс клетки, время от начала партии в мс)"""
+        numbers = self.numbers
+        time_ms = 0
+        for code in numbers:
+            delta = next(numbers, None)
+            if delta is None:
+                raise ValueError("Файл повтора обрезан")
+            time_ms += delta
+            yield code & 3, code >> 2, time_ms
+
+
+def replay_moves(engine, moves):
+    """Применить ходы повтора к движку, возвращая результат каждого хода"""
+    actions = (engine.reveal, engine.toggle_flag, engine.chord)
+    width = engine.width
+    for action, index, time_ms in moves:
+        y, x = divmod(index, width)
+        if not 0 <= y < engine.height or action > CHORD:
+            raise ValueError("Ход повтора вне поля")
+        yield action, index, time_ms, actions[action](x, y)
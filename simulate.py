@@ -0,0 +1,129 @@
+"""Пакетная симуляция партий ботом-решателем (без интерфейса и Tkinter)"""
+import argparse
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from engine import MinesweeperEngine
+from solver import ConstraintSolver, ProbabilityEngine
+
+
+def play_game(width, height, mine_count, seed):
+    """Сыграть одну партию ботом: (победа, число угадываний)
+
+    Первый ход - в центр поля (он всегда безопасен). Дальше бот открывает
+    выведенные решателем клетки, а когда их нет - угадывает клетку с
+    наименьшей вероятностью мины.
+    """
+    engine = MinesweeperEngine(width, height, mine_count, seed=seed)
+    engine.reveal(width // 2, height // 2)
+    solver = ConstraintSolver(engine)
+    probabilities = ProbabilityEngine(solver)
+    guesses = 0
+    while not engine.game_over:
+        i = solver.next_safe()
+        if i is None:
+            i, _ = probabilities.best_guess()
+            guesses += 1
+        y, x = divmod(i, width)
+        result = engine.reveal(x, y)
+        solver.update(result.changed)
+    return engine.game_won, guesses
+
+
+def play_range(width, height, mine_count, first_seed, count):
+    """Сыграть партии с зернами first_seed..first_seed+count-1 (в процессе пула)"""
+    wins = guesses = 0
+    for seed in range(first_seed, first_seed + count):
+        won, game_guesses = play_game(width, height, mine_count, seed)
+        wins += won
+        guesses += game_guesses
+    return count, wins, guesses
+
+
+class SimulationStats:
+    """Накопленные итоги симуляции"""
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.guesses = 0
+        self.started_at = time.perf_counter()
+
+    def add(self, games, wins, guesses):
+        self.games += games
+        self.wins += wins
+        self.guesses += guesses
+
+    def summary(self):
+        """Строка с процентом побед, угадываниями на партию и скоростью"""
+        elapsed = time.perf_counter() - self.started_at
+        games = max(self.games, 1)
+        return (f"{self.games} игр | побед {self.wins / games:.2%} | "
+                f"угадываний на игру {self.guesses / games:.3f} | "
+                f"{self.games / max(elapsed, 1e-9):.0f} игр/с")
+
+
+def simulate(width, height, mine_count, games, workers=None, chunk=200, seed=None,
+             report=print, interval=1.0):
+    """Сыграть games партий в пуле процессов, сообщая промежуточные итоги
+
+    Работа делится на диапазоны зерен по chunk партий; в очереди держится по
+    две задачи на процесс, так что память не зависит от числа партий.
+    Итоги передаются в report не чаще раза в interval секунд и в конце.
+    """
+    workers = workers or os.cpu_count() or 1
+    next_seed = seed if seed is not None else random.getrandbits(64)
+    stats = SimulationStats()
+    remaining = games
+    pending = set()
+    last_report = stats.started_at
+
+    with ProcessPoolExecutor(workers) as executor:
+        try:
+            while remaining or pending:
+                while remaining and len(pending) < workers * 2:
+                    count = min(chunk, remaining)
+                    pending.add(executor.submit(play_range, width, height, mine_count,
+                                                next_seed, count))
+                    next_seed += count
+                    remaining -= count
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats.add(*future.result())
+                if time.perf_counter() - last_report >= interval:
+                    last_report = time.perf_counter()
+                    report(stats.summary())
+        except KeyboardInterrupt:
+            # Прерванная симуляция все равно выводит то, что успела набрать
+            for future in pending:
+                future.cancel()
+            report("Прервано")
+    report(stats.summary())
+    return stats
+
+
+def main(argv=None):
+    """Команда simulate: python m3.py simulate --width 30 --height 16 --mines 99"""
+    parser = argparse.ArgumentParser(prog="m3.py simulate",
+                                     description="Пакетная симуляция партий ботом-решателем")
+    parser.add_argument("--width", type=int, default=30, help="ширина поля")
+    parser.add_argument("--height", type=int, default=16, help="высота поля")
+    parser.add_argument("--mines", type=int, default=99, help="количество мин")
+    parser.add_argument("--games", type=int, default=1000, help="сколько партий сыграть")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument("--chunk", type=int, default=200, help="партий в одной задаче процесса")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="первое зерно (партии получают зерна подряд)")
+    args = parser.parse_args(argv)
+
+    free_cells = args.width * args.height - 9
+    if args.width < 3 or args.height < 3 or not 0 < args.mines <= free_cells:
+        parser.error(f"на поле {args.width}x{args.height} нужно от 1 до {free_cells} мин")
+
+    simulate(args.width, args.height, args.mines, args.games, args.workers,
+             max(args.chunk, 1), args.seed)
+    return 0
@@ -0,0 +1,140 @@
+"""Сохранение и восстановление незаконченной партии в компактном двоичном виде
+
+Файл: сигнатура MAGIC, заголовок HEADER (размеры, мины, зерно, время
+партии, длины дополнительных данных), три битовые плоскости (мины, открытые,
+флаги) по биту на клетку, уровень сложности и дополнительные данные
+(например, повтор), а в конце - CRC32 всего предыдущего.
+"""
+import struct
+import zlib
+
+from engine import FLAGGED, MINE, REVEALED, MinesweeperEngine, count_neighbors, np
+from replay import MAX_SIDE
+
+MAGIC = b"MSS1"
+HEADER = struct.Struct("<IIIQQII")  # Ширина, высота, мины, зерно, мс партии, длины уровня и доп. данных
+CHECKSUM = struct.Struct("<I")
+
+# Таблицы bytes.translate: клетка -> символ '0'/'1' для нужного флага
+_TO_BITS = {
+    flag: bytes(ord('1') if b & flag else ord('0') for b in range(256))
+    for flag in (MINE, REVEALED, FLAGGED)
+}
+# И обратно: символ бита -> значение флага в байте клетки
+_FROM_BITS = {
+    flag: bytes(flag if b == ord('1') else 0 for b in range(256))
+    for flag in (MINE, REVEALED, FLAGGED)
+}
+
+
+def pack_plane(cells, flag):
+    """Битовая плоскость флага: бит на клетку, старший бит байта - первая клетка
+
+    С NumPy - np.packbits по маске. Без NumPy клетки переводятся в строку
+    из '0' и '1' через bytes.translate и читаются как одно двоичное число.
+    """
+    size = (len(cells) + 7) // 8
+    if np is not None:
+        mask = (np.frombuffer(cells, dtype=np.uint8) & flag) != 0
+        return np.packbits(mask).tobytes()
+    bits = cells.translate(_TO_BITS[flag]) + b"0" * (size * 8 - len(cells))
+    return int(bits, 2).to_bytes(size, "big") if bits else b""
+
+
+def unpack_plane(plane, count, flag):
+    """Байты клеток (значение flag или 0) из битовой плоскости"""
+    if np is not None:
+        bits = np.unpackbits(np.frombuffer(plane, dtype=np.uint8), count=count)
+        return (bits * np.uint8(flag)).tobytes()
+    bits = format(int.from_bytes(plane, "big"), f"0{len(plane) * 8}b")[:count]
+    return bits.encode("ascii").translate(_FROM_BITS[flag])
+
+
+def dump(engine, elapsed_ms, difficulty, extra=b""):
+    """Снимок партии в байтах"""
+    level = difficulty.encode("utf-8")
+    data = bytearray(MAGIC)
+    data += HEADER.pack(engine.width, engine.height, engine.mine_count, engine.seed,
+                        elapsed_ms, len(level), len(extra))
+    for flag in (MINE, REVEALED, FLAGGED):
+        data += pack_plane(engine.cells, flag)
+    data += level
+    data += extra
+    data += CHECKSUM.pack(zlib.crc32(data))
+    return bytes(data)
+
+
+def load(data):
+    """Восстановить партию из снимка: (движок, мс партии, уровень, доп. данные)
+
+    Поврежденный или чужой файл дает ValueError.
+    """
+    if len(data) < len(MAGIC) + HEADER.size + CHECKSUM.size or data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Это не файл сохранения")
+    body, (checksum,) = data[:-CHECKSUM.size], CHECKSUM.unpack(data[-CHECKSUM.size:])
+    if zlib.crc32(body) != checksum:
+        raise ValueError("Файл сохранения поврежден")
+
+    width, height, mine_count, seed, elapsed_ms, level_size, extra_size = HEADER.unpack_from(
+        body, len(MAGIC))
+    if not (1 <= width <= MAX_SIDE and 1 <= height <= MAX_SIDE and mine_count < width * height):
+        raise ValueError("Файл сохранения поврежден")
+    count = width * height
+    plane_size = (count + 7) // 8
+    offset = len(MAGIC) + HEADER.size
+    if len(body) != offset + 3 * plane_size + level_size + extra_size:
+        raise ValueError("Файл сохранения поврежден")
+
+    engine = MinesweeperEngine(width, height, mine_count, seed=seed)
+    layers = []
+    for flag in (MINE, REVEALED, FLAGGED):
+        layers.append(unpack_plane(body[offset:offset + plane_size], count, flag))
+        offset += plane_size
+    engine.cells[:] = _merge(layers, count)
+    level = body[offset:offset + level_size].decode("utf-8")
+    extra = bytes(body[offset + level_size:])
+
+    _restore_counters(engine)
+    return engine, elapsed_ms, level, extra
+
+
+def _merge(layers, count):
+    """Сложить байты клеток плоскостей (биты флагов не пересекаются)
+
+    Без NumPy байтовые строки складываются как большие числа: переносов
+    между байтами нет, поэтому | больших чисел - это | каждого байта.
+    """
+    if np is not None:
+        merged = np.zeros(count, dtype=np.uint8)
+        for layer in layers:
+            merged |= np.frombuffer(layer, dtype=np.uint8)
+        return merged.tobytes()
+    merged = 0
+    for layer in layers:
+        merged |= int.from_bytes(layer, "big")
+    return merged.to_bytes(count, "big")
+
+
+def _restore_counters(engine):
+    """Пересчитать мины, числа соседей и счетчики движка по битам клеток"""
+    cells = engine.cells
+    engine.mines = [i for i in range(len(cells)) if cells[i] & MINE] if np is None else \
+        np.flatnonzero(np.frombuffer(cells, dtype=np.uint8) & MINE).tolist()
+    if len(engine.mines) != engine.mine_count and engine.mines:
+        raise ValueError("Файл сохранения поврежден")
+    count_neighbors(cells, engine.width, engine.height, engine.mines)
+
+    engine.first_move = not engine.mines
+    engine.revealed_count = _count(cells, REVEALED)
+    engine.flags_placed = _count(cells, FLAGGED)
+    engine.flags_correct = _count(cells, MINE | FLAGGED)
+    engine.safe_remaining = len(cells) - engine.mine_count - engine.revealed_count
+    if engine.revealed_count and engine.first_move:
+        raise ValueError("Файл сохранения поврежден")
+
+
+def _count(cells, flags):
+    """Сколько клеток несут все указанные флаги"""
+    if np is not None:
+        return int(np.count_nonzero((np.frombuffer(cells, dtype=np.uint8) & flags) == flags))
+    return cells.translate(bytes(1 if b & flags == flags else 0 for b in range(256))).count(1)
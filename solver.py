@@ -0,0 +1,405 @@
+"""Логический решатель Сапера по видимому игроку состоянию поля"""
+from collections import defaultdict
+from math import comb
+
+from engine import FLAGGED, NEIGHBORS_MASK, REVEALED
+
+
+class ConstraintSolver:
+    """Находит клетки, которые наверняка безопасны или наверняка заминированы
+
+    Каждое открытое число дает ограничение «среди этих закрытых клеток
+    ровно k мин». Флаги игрока считаются минами. Правила:
+    одиночное ограничение (0 мин или все клетки - мины) и пары
+    ограничений, где одно вложено в другое (разность множеств получает
+    разность счетчиков). Вывод инкрементальный: update() пересобирает только
+    ограничения рядом с изменившимися клетками и продолжает от них.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.reset()
+
+    def reset(self):
+        """Забыть все выводы и пересобрать ограничения по всему полю"""
+        self.constraints = {}  # Индекс открытого числа -> (frozenset закрытых клеток, мин среди них)
+        self.cell_constraints = defaultdict(set)  # Закрытая клетка -> числа, которые ее касаются
+        self.safe = set()  # Выведенные безопасные клетки, еще не открытые
+        self.mines = set()  # Выведенные мины
+        cells = self.engine.cells
+        self.update(i for i in range(len(cells)) if cells[i] & REVEALED)
+
+    def update(self, changed):
+        """Учесть клетки, изменившиеся за ход (открытые или с переключенным флагом)"""
+        cells = self.engine.cells
+        neighbor_indices = self.engine.neighbor_indices
+        touched = set()
+        for i in changed:
+            if cells[i] & REVEALED:
+                self.safe.discard(i)
+                touched.add(i)
+            for j in neighbor_indices(i):
+                if cells[j] & REVEALED:
+                    touched.add(j)
+
+        queue = set()
+        for i in touched:
+            self._rebuild(i, queue)
+        self._propagate(queue)
+        self._global_rule()
+
+    def next_safe(self):
+        """Одна безопасная клетка для хода или None"""
+        cells = self.engine.cells
+        while self.safe:
+            i = self.safe.pop()
+            if not cells[i] & (REVEALED | FLAGGED):
+                self.safe.add(i)
+                return i
+        return None
+
+    def frontier(self):
+        """Закрытые клетки, которых касаются ограничения"""
+        return set(self.cell_constraints)
+
+    def _rebuild(self, i, queue):
+        """Заново составить ограничение открытого числа i"""
+        self._drop(i)
+        cells = self.engine.cells
+        cell = cells[i]
+        if not cell & REVEALED or not cell & NEIGHBORS_MASK:
+            return
+
+        unknown = []
+        count = cell & NEIGHBORS_MASK
+        for j in self.engine.neighbor_indices(i):
+            neighbor = cells[j]
+            if neighbor & REVEALED or j in self.safe:
+                continue
+            if neighbor & FLAGGED or j in self.mines:
+                count -= 1
+            else:
+                unknown.append(j)
+        if not unknown:
+            return
+
+        self._store(i, frozenset(unknown), count)
+        queue.add(i)
+
+    def _store(self, i, unknown, count):
+        self.constraints[i] = (unknown, count)
+        for j in unknown:
+            self.cell_constraints[j].add(i)
+
+    def _drop(self, i):
+        constraint = self.constraints.pop(i, None)
+        if constraint is None:
+            return
+        for j in constraint[0]:
+            owners = self.cell_constraints[j]
+            owners.discard(i)
+            if not owners:
+                del self.cell_constraints[j]
+
+    def _propagate(self, queue):
+        """Применять правила, пока очередь ограничений не опустеет"""
+        constraints = self.constraints
+        while queue:
+            i = queue.pop()
+            constraint = constraints.get(i)
+            if constraint is None:
+                continue
+            unknown, count = constraint
+
+            # Одиночное ограничение
+            if count == 0:
+                self._mark(unknown, False, queue)
+                continue
+            if count == len(unknown):
+                self._mark(unknown, True, queue)
+                continue
+
+            # Вложенные ограничения среди соседей по клеткам
+            others = set()
+            for j in unknown:
+                others.update(self.cell_constraints[j])
+            others.discard(i)
+            for k in others:
+                other = constraints.get(k)
+                if other is None:
+                    continue
+                other_unknown, other_count = other
+                if unknown < other_unknown:
+                    rest, rest_count = other_unknown - unknown, other_count - count
+                elif other_unknown < unknown:
+                    rest, rest_count = unknown - other_unknown, count - other_count
+                else:
+                    continue
+                if rest_count == 0:
+                    self._mark(rest, False, queue)
+                elif rest_count == len(rest):
+                    self._mark(rest, True, queue)
+                if i not in constraints:
+                    break
+
+    def _mark(self, cells, is_mine, queue):
+        """Записать вывод и убрать клетки из всех ограничений"""
+        for j in list(cells):
+            if j in self.safe or j in self.mines:
+                continue
+            (self.mines if is_mine else self.safe).add(j)
+            for i in list(self.cell_constraints.get(j, ())):
+                unknown, count = self.constraints[i]
+                self._drop(i)
+                unknown = unknown - {j}
+                if is_mine:
+                    count -= 1
+                if unknown:
+                    self._store(i, unknown, count)
+                    queue.add(i)
+
+    def _global_rule(self):
+        """Правило общего счетчика мин для конца партии"""
+        engine = self.engine
+        if engine.first_move or engine.game_over:
+            return
+        cells = engine.cells
+        # Дешевая проверка до подсчета мин: правило срабатывает, только если
+        # все мины уже известны или все неизвестные клетки - мины
+        hidden = len(cells) - engine.revealed_count - len(self.safe)
+        if hidden != engine.mine_count and engine.flags_placed + len(self.mines) < engine.mine_count:
+            return
+
+        known_mines = engine.flags_placed + sum(1 for j in self.mines if not cells[j] & FLAGGED)
+        remaining = engine.mine_count - known_mines
+        unknown = (len(cells) - engine.revealed_count - known_mines) - len(self.safe)
+        if unknown <= 0 or (remaining != 0 and remaining != unknown):
+            return
+
+        hidden = [
+            j for j in range(len(cells))
+            if not cells[j] & (REVEALED | FLAGGED) and j not in self.mines and j not in self.safe
+        ]
+        queue = set()
+        self._mark(hidden, remaining != 0, queue)
+        self._propagate(queue)
+
+
+class ProbabilityEngine:
+    """Точные вероятности мин для закрытых клеток
+
+    Граница (закрытые клетки, которых касаются числа) разбивается на
+    независимые компоненты связности. Для каждой компоненты динамическим
+    программированием по клеткам считается, сколькими способами в ней
+    может лежать k мин и в скольких из них заминирована каждая клетка.
+    Состояние - остаток мин в каждом ограничении, невозможные ветви
+    отсекаются сразу. Результаты кэшируются по набору ограничений
+    компоненты, поэтому между ходами пересчитываются только изменившиеся.
+    Компоненты сворачиваются между собой и взвешиваются числом сочетаний
+    C(U, R - K) для U внутренних клеток и R оставшихся мин.
+    """
+
+    CACHE_LIMIT = 4096  # Сколько компонент помнить между ходами
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.cache = {}
+
+    def probabilities(self):
+        """Вероятность мины для каждой клетки поля (None - клетка открыта)
+
+        Выведенные решателем мины и флаги получают 1.0, безопасные - 0.0.
+        """
+        solver = self.solver
+        engine = solver.engine
+        cells = engine.cells
+        components = self._components()
+
+        # Оставшиеся мины и внутренние клетки без ограничений
+        known_mines = engine.flags_placed + sum(1 for j in solver.mines if not cells[j] & FLAGGED)
+        remaining = engine.mine_count - known_mines
+        frontier = solver.frontier()
+        interior = [
+            j for j in range(len(cells))
+            if not cells[j] & (REVEALED | FLAGGED)
+            and j not in solver.mines and j not in solver.safe and j not in frontier
+        ]
+
+        solved = [self._solve_cached(component) for component in components]
+
+        # Распределение числа мин по всей границе и по границе без каждой компоненты
+        prefix = [[1]]
+        for ways, _ in solved:
+            prefix.append(_convolve(prefix[-1], ways))
+        suffix = [[1]]
+        for ways, _ in reversed(solved):
+            suffix.append(_convolve(suffix[-1], ways))
+        suffix.reverse()
+
+        weights = [comb(len(interior), remaining - k) if 0 <= remaining - k <= len(interior) else 0
+                   for k in range(len(prefix[-1]) + 1)]
+        total = sum(ways * weights[k] for k, ways in enumerate(prefix[-1]))
+        if total == 0:
+            raise ValueError("Состояние поля противоречиво: флаги не согласуются с числами")
+
+        result = [None] * len(cells)
+        for j in range(len(cells)):
+            if not cells[j] & REVEALED:
+                result[j] = 1.0 if cells[j] & FLAGGED else None
+        for j in solver.safe:
+            result[j] = 0.0
+        for j in solver.mines:
+            result[j] = 1.0
+
+        for index, (ways, hits) in enumerate(solved):
+            others = _convolve(prefix[index], suffix[index + 1])
+            # Вес компоненты с k минами с учетом всех остальных и внутренних клеток
+            outer = [
+                sum(count * weights[k + m] for m, count in enumerate(others))
+                for k in range(len(ways))
+            ]
+            for cell, cell_hits in hits.items():
+                result[cell] = sum(h * outer[k] for k, h in enumerate(cell_hits)) / total
+
+        if interior:
+            expected = sum(ways * weights[k] * (remaining - k)
+                           for k, ways in enumerate(prefix[-1]) if weights[k])
+            p_interior = expected / (total * len(interior))
+            for j in interior:
+                result[j] = p_interior
+        return result
+
+    def best_guess(self):
+        """Закрытая клетка с наименьшей вероятностью мины и сама вероятность"""
+        best, best_p = None, 2.0
+        for j, p in enumerate(self.probabilities()):
+            if p is not None and p < best_p:
+                best, best_p = j, p
+        return best, best_p
+
+    def _components(self):
+        """Разбить ограничения решателя на независимые компоненты"""
+        solver = self.solver
+        seen = set()
+        components = []
+        for start in solver.constraints:
+            if start in seen:
+                continue
+            seen.add(start)
+            stack = [start]
+            component = []
+            while stack:
+                i = stack.pop()
+                component.append(solver.constraints[i])
+                for j in solver.constraints[i][0]:
+                    for k in solver.cell_constraints[j]:
+                        if k not in seen:
+                            seen.add(k)
+                            stack.append(k)
+            components.append(component)
+        return components
+
+    def _solve_cached(self, component):
+        key = frozenset(component)
+        result = self.cache.get(key)
+        if result is None:
+            if len(self.cache) >= self.CACHE_LIMIT:
+                self.cache.clear()
+            result = self.cache[key] = _solve_component(component)
+        return result
+
+
+def _convolve(a, b):
+    """Свертка многочленов-распределений по числу мин"""
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+
+def _shift_add(target, poly, shift):
+    """target += poly * z^shift (многочлены как списки коэффициентов)"""
+    if len(target) < len(poly) + shift:
+        target.extend([0] * (len(poly) + shift - len(target)))
+    for k, ways in enumerate(poly):
+        target[k + shift] += ways
+
+
+def _solve_component(component):
+    """Способы расстановки мин в компоненте: по числу мин и по клеткам
+
+    Возвращает (ways, hits): ways[k] - число расстановок с k минами,
+    hits[cell][k] - сколько из них ставят мину в cell.
+    """
+    # Порядок обхода клеток - в ширину по ограничениям, чтобы ограничения
+    # закрывались как можно раньше и состояние оставалось узким
+    cell_cons = defaultdict(list)
+    for c, (cells, _) in enumerate(component):
+        for cell in cells:
+            cell_cons[cell].append(c)
+    order = []
+    placed = set()
+    for cells, _ in component:
+        for cell in sorted(cells):
+            if cell not in placed:
+                placed.add(cell)
+                order.append(cell)
+    order.sort(key=lambda cell: min(cell_cons[cell]))
+
+    # Сколько клеток ограничения остается после позиции d
+    left = [len(cells) for cells, _ in component]
+    left_after = []
+    for cell in order:
+        for c in cell_cons[cell]:
+            left[c] -= 1
+        left_after.append([left[c] for c in cell_cons[cell]])
+
+    # Прямой проход: достижимые состояния и переходы
+    start = tuple(count for _, count in component)
+    layers = [{start: [1]}]
+    transitions = []
+    for d, cell in enumerate(order):
+        layer = {}
+        moves = {}
+        cons = cell_cons[cell]
+        limits = left_after[d]
+        for state, poly in layers[d].items():
+            state_moves = []
+            for value in (0, 1):
+                new_state = list(state)
+                for c, limit in zip(cons, limits):
+                    rest = new_state[c] - value
+                    if rest < 0 or rest > limit:
+                        break
+                    new_state[c] = rest
+                else:
+                    new_state = tuple(new_state)
+                    state_moves.append((value, new_state))
+                    _shift_add(layer.setdefault(new_state, []), poly, value)
+            moves[state] = state_moves
+        layers.append(layer)
+        transitions.append(moves)
+
+    # Обратный проход: число дополнений из каждого состояния
+    after = {state: [1] for state in layers[-1]}
+    hits = {}
+    for d in range(len(order) - 1, -1, -1):
+        before = {}
+        cell_hits = []
+        for state, forward in layers[d].items():
+            completions = []
+            for value, new_state in transitions[d][state]:
+                tail = after.get(new_state)
+                if tail is None:
+                    continue
+                _shift_add(completions, tail, value)
+                if value:
+                    _shift_add(cell_hits, _convolve(forward, tail), 1)
+            if completions:
+                before[state] = completions
+        hits[order[d]] = cell_hits
+        after = before
+    ways = after.get(start, [0])
+    return ways, hits
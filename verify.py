@@ -0,0 +1,110 @@
+"""Проверка рекордов повторным проигрыванием их повторов"""
+import argparse
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from engine import MinesweeperEngine
+from records import READ_ERRORS, open_record_store
+from replay import Replay, replay_moves
+
+
+def verify_replay(stream, claim):
+    """Подтверждает ли повтор заявленный результат: (успех, причина отказа)
+
+    Повтор должен быть партией на том же поле (размер, мины, зерно),
+    закончиться победой, а время победного хода - совпасть с заявленным.
+    """
+    try:
+        replay = Replay(stream)
+        header = (replay.width, replay.height, replay.mine_count, replay.seed)
+        claimed = (claim["width"], claim["height"], claim["mines"], int(claim["seed"]))
+        if header != claimed:
+            return False, "повтор сыгран на другом поле"
+
+        engine = MinesweeperEngine(replay.width, replay.height, replay.mine_count, seed=replay.seed)
+        won_at = None
+        for _, _, time_ms, result in replay_moves(engine, replay.moves()):
+            if won_at is not None:
+                return False, "ходы после окончания партии"
+            if result.exploded:
+                return False, "в повторе открыта мина"
+            if result.won:
+                won_at = time_ms
+    except (ValueError, KeyError, TypeError) as error:
+        return False, f"повтор не читается ({error})"
+
+    if won_at is None:
+        return False, "партия в повторе не выиграна"
+    if won_at != claim["time_ms"]:
+        return False, f"время повтора {won_at} мс, заявлено {claim['time_ms']} мс"
+    return True, ""
+
+
+def verify_replay_bytes(data, claim):
+    """verify_replay для повтора, еще не записанного на диск"""
+    return verify_replay(io.BytesIO(data), claim)
+
+
+def verify_record(record):
+    """Проверить запись таблицы рекордов по ее файлу повтора
+
+    Старые записи (legacy), перенесенные из времени до повторов, повторов не
+    имеют: для них вместо успеха возвращается None - проверить их нечем, но и
+    ошибкой это не считается. Любая другая запись без повтора не подтверждена.
+    """
+    path = record.get("replay")
+    if not path:
+        if record.get("legacy"):
+            return None, "старая запись без повтора"
+        return False, "у записи нет повтора"
+    try:
+        with open(path, 'rb') as f:
+            return verify_replay(f, record)
+    except OSError:
+        return False, f"файл повтора {path} не найден"
+
+
+def verify_records(records, workers=None):
+    """Проверить записи в пуле процессов: список (запись, успех, причина)"""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        chunksize = max(len(records) // (workers * 4), 1)
+        results = executor.map(verify_record, records, chunksize=chunksize)
+        return [(record, ok, reason) for record, (ok, reason) in zip(records, results)]
+
+
+def main(argv=None):
+    """Команда verify: перепроверить все таблицы рекордов по повторам"""
+    parser = argparse.ArgumentParser(prog="m3.py verify",
+                                     description="Проверка таблиц рекордов по повторам партий")
+    parser.add_argument("--db", default="minesweeper_records.db", help="база рекордов")
+    parser.add_argument("--json", default="minesweeper_records.json",
+                        help="файл рекордов (если sqlite3 недоступен)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="число процессов (по умолчанию - все ядра)")
+    args = parser.parse_args(argv)
+
+    # Только чтение: проверка не создает базу и не обновляет ее схему
+    try:
+        store = open_record_store(args.db, args.json, read_only=True)
+    except FileNotFoundError as error:
+        parser.error(f"файл рекордов {error.filename} не найден")
+    except READ_ERRORS as error:
+        parser.error(f"не удалось открыть рекорды: {error}")
+    try:
+        records = [record for key in store.configurations() for record in store.top(key)]
+    finally:
+        store.close()
+
+    failed = legacy = 0
+    for record, ok, reason in verify_records(records, args.workers):
+        if ok is None:
+            legacy += 1
+        elif not ok:
+            failed += 1
+            size = f"{record.get('width')}x{record.get('height')}, {record.get('mines')} мин"
+            print(f"❌ {record['name']} ({size}, {record['time_ms']} мс): {reason}")
+    print(f"Проверено записей: {len(records) - legacy}, не подтверждено: {failed}, "
+          f"старых записей без повтора: {legacy}")
+    return 1 if failed else 0